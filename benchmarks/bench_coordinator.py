@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from types import SimpleNamespace
+
+import hcalory_control.heater
+import pytest
+
+from benchmarks.conftest import summarize
+from benchmarks.simulator import SimulatedProxy, SimulationProfile
+from custom_components.hcalory_ble.coordinator import (
+    CONNECTION_HOLD_FACTOR,
+    DEADBAND_HOLD_UPDATES,
+    DORMANT_AFTER_FAILURES,
+    MIN_CONNECTION_HOLD,
+    HcaloryCoordinator,
+)
+from custom_components.hcalory_ble.pipeline import HEDGE_MIN_SAMPLES, READ_TIMEOUT
+
+POLLS = 50
+
+
+@pytest.mark.parametrize(
+    "profile",
+    [
+        SimulationProfile(latency=0.01, seed=1),
+        SimulationProfile(latency=0.05, jitter=0.05, seed=1),
+    ],
+    ids=["fast-link", "slow-link"],
+)
+async def bench_poll_latency(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+    profile: SimulationProfile,
+) -> None:
+    coordinator = make_coordinator(profile)
+    await coordinator.async_refresh()
+    samples = []
+    for _ in range(POLLS):
+        started = time.monotonic()
+        await coordinator.async_refresh()
+        samples.append(time.monotonic() - started)
+        assert coordinator.last_update_success
+    results = summarize(samples)
+    record_benchmark(**results)
+    # A poll is a pump_data write and a reply, so anything well past two round trips is us, not the radio.
+    assert results["p95"] < 4 * (profile.latency + profile.jitter) + 0.05
+
+
+async def bench_reconnect(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    profile = SimulationProfile(latency=0.01, connect_time=0.1, seed=1)
+    coordinator = make_coordinator(profile)
+    await coordinator.async_refresh()
+    samples = []
+    for _ in range(10):
+        coordinator.heater.drop_connection()  # type: ignore[attr-defined]
+        started = time.monotonic()
+        await coordinator.async_refresh()
+        samples.append(time.monotonic() - started)
+        assert coordinator.last_update_success
+        assert coordinator.heater.is_connected
+    results = summarize(samples)
+    record_benchmark(**results)
+    assert results["p95"] < profile.connect_time + 4 * profile.latency + 0.1
+
+
+async def bench_concurrent_reconnect(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """The coordinator and a few entities all noticing the same dropout at once."""
+    profile = SimulationProfile(latency=0.01, connect_time=0.1, seed=1)
+    coordinator = make_coordinator(profile)
+    await coordinator.async_refresh()
+    heater = coordinator.heater
+    connects = heater.connects  # type: ignore[attr-defined]
+    # The first refresh had to go looking for the heater too, so only count what the dropout costs.
+    attempts = heater.stats.reconnects
+    heater.drop_connection()  # type: ignore[attr-defined]
+
+    started = time.monotonic()
+    await asyncio.gather(*(coordinator.async_find_device() for _ in range(5)))
+    elapsed = time.monotonic() - started
+
+    reconnects = heater.connects - connects  # type: ignore[attr-defined]
+    record_benchmark(elapsed=elapsed, callers=5, reconnects=reconnects)
+    assert heater.is_connected
+    assert reconnects == 1
+    assert heater.stats.reconnects - attempts == 1
+
+
+async def bench_dormant_wakeup(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """A heater that's been switched off at the battery, and then comes back."""
+    profile = SimulationProfile(latency=0.01, connect_time=0.1, seed=1)
+    coordinator = make_coordinator(profile)
+    heater = coordinator.heater
+    # A proxy with no slots refuses every connection, which is as good as the heater not being there.
+    heater.proxy = SimulatedProxy("nowhere", slots=0)  # type: ignore[attr-defined]
+    for _ in range(DORMANT_AFTER_FAILURES):
+        await coordinator.async_refresh()
+    assert coordinator.dormant
+    assert coordinator.update_interval is None
+    attempts = heater.stats.operations["connect"].count
+
+    heater.proxy = None  # type: ignore[attr-defined]
+    started = time.monotonic()
+    coordinator._async_handle_advertisement(
+        SimpleNamespace(rssi=-70, source="local", manufacturer_data={}),  # type: ignore[arg-type]
+        None,  # type: ignore[arg-type]
+    )
+    async with asyncio.timeout(5.0):
+        while not (coordinator.last_update_success and heater.is_connected):
+            await asyncio.sleep(0.005)
+    recovery = time.monotonic() - started
+
+    assert not coordinator.dormant
+    assert heater.stats.operations["connect"].count == attempts + 1
+    record_benchmark(recovery=recovery, attempts_while_dormant=attempts)
+    assert recovery < profile.connect_time + 4 * profile.latency + 0.1
+
+
+async def bench_idle_release(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """An off heater giving its slot back, and what it costs to get it back when somebody wants it."""
+    profile = SimulationProfile(latency=0.01, connect_time=0.1, seed=1)
+    coordinator = make_coordinator(profile)
+    await coordinator.async_refresh()
+    heater = coordinator.heater
+    coordinator._async_handle_advertisement(
+        SimpleNamespace(rssi=-70, source="local", manufacturer_data={}),  # type: ignore[arg-type]
+        None,  # type: ignore[arg-type]
+    )
+    hold = coordinator.connection_hold()
+    connect = heater.stats.percentile("connect", 50)
+    assert connect is not None
+    assert hold == max(
+        connect * CONNECTION_HOLD_FACTOR,
+        MIN_CONNECTION_HOLD.total_seconds(),
+    )
+
+    # Not idle long enough yet.
+    coordinator._async_check_idle(None)
+    assert coordinator._releasing is None
+    coordinator._active_at -= hold
+    coordinator._async_check_idle(None)
+    assert coordinator._releasing is not None
+    await coordinator._releasing
+    assert not heater.is_connected
+    assert coordinator.released
+
+    # Nothing to do for an off heater that's still advertising, so the watchdog leaves it alone.
+    connects = heater.connects  # type: ignore[attr-defined]
+    await coordinator.async_refresh()
+    assert heater.connects == connects  # type: ignore[attr-defined]
+
+    started = time.monotonic()
+    await coordinator.pipeline.send_command(hcalory_control.heater.Command.start_heat)
+    on_demand = time.monotonic() - started
+    assert heater.is_connected
+    assert heater.connects == connects + 1  # type: ignore[attr-defined]
+    record_benchmark(hold=hold, reconnect_on_demand=on_demand)
+    assert on_demand < profile.connect_time + 4 * profile.latency + 0.1
+
+
+async def bench_connection_path(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """A heater that sounds loudest through a slow proxy, and ends up on a quicker one once the slow one fills up."""
+    profile = SimulationProfile(latency=0.01, connect_time=0.1, seed=1)
+    coordinator = make_coordinator(profile)
+    heater = coordinator.heater
+    near = SimulatedProxy("near", latency=0.1)
+    far = SimulatedProxy("far")
+    heater.heard_by = {"near": (near, -55), "far": (far, -62)}  # type: ignore[attr-defined]
+
+    for _ in range(5):
+        await coordinator.async_refresh()
+    assert coordinator.path == "near"
+
+    # Everybody else behind the near proxy shows up, so the reconnect has to go through the far one.
+    near.slots = 0
+    heater.drop_connection()  # type: ignore[attr-defined]
+    for _ in range(5):
+        await coordinator.async_refresh()
+        assert coordinator.last_update_success
+    assert coordinator.path == "far"
+    assert heater.proxy is far  # type: ignore[attr-defined]
+
+    near_stats = coordinator.paths.stats["near"]
+    far_stats = coordinator.paths.stats["far"]
+    record_benchmark(
+        near_latency=near_stats.latency,
+        far_latency=far_stats.latency,
+        near_reads=near_stats.reads,
+        far_reads=far_stats.reads,
+    )
+    # Every read counted against the proxy it actually went through.
+    assert (
+        near_stats.reads + far_stats.reads == heater.stats.operations["get_data"].count
+    )
+    assert far_stats.latency is not None and near_stats.latency is not None
+    assert far_stats.latency < near_stats.latency
+
+
+async def bench_hedged_reads(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """A link that starts dropping a good share of what goes over it, once we know what normal looks like."""
+    profile = SimulationProfile(latency=0.01, seed=1)
+    coordinator = make_coordinator(profile)
+    heater = coordinator.heater
+    for _ in range(HEDGE_MIN_SAMPLES):
+        await coordinator.async_refresh()
+    hedge_after, deadline = coordinator.pipeline.read_timeouts()
+    assert hedge_after is not None
+
+    profile.loss = 0.2
+    samples = []
+    for _ in range(POLLS):
+        started = time.monotonic()
+        await coordinator.async_refresh()
+        samples.append(time.monotonic() - started)
+        assert coordinator.last_update_success
+    results = summarize(samples)
+    record_benchmark(
+        **results,
+        hedge_after=hedge_after,
+        deadline=deadline,
+        hedges=heater.stats.hedges,
+    )
+    assert heater.stats.hedges > 0
+    # Without hedging, every lost pump_data or reply would have been a READ_TIMEOUT stall and a reconnect.
+    assert results["max"] < deadline
+
+
+async def bench_slow_reconnect_after_hedging(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """A heater that takes longer to connect to than a read's deadline, dropping out once the deadline has tightened."""
+    profile = SimulationProfile(latency=0.01, seed=1)
+    coordinator = make_coordinator(profile)
+    heater = coordinator.heater
+    for _ in range(HEDGE_MIN_SAMPLES):
+        await coordinator.async_refresh()
+    _hedge_after, deadline = coordinator.pipeline.read_timeouts()
+    assert deadline < READ_TIMEOUT
+
+    profile.connect_time = deadline + 1.0
+    heater.drop_connection()  # type: ignore[attr-defined]
+    started = time.monotonic()
+    await coordinator.async_refresh()
+    elapsed = time.monotonic() - started
+    record_benchmark(
+        elapsed=elapsed, deadline=deadline, connect_time=profile.connect_time
+    )
+    # The connect isn't held to the deadline, only the round trip after it.
+    assert coordinator.last_update_success
+    assert heater.is_connected
+
+
+async def bench_voltage_deadband(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """A battery sitting right on the edge between two volts, and then really dropping one."""
+    coordinator = make_coordinator(SimulationProfile(latency=0.01, seed=1))
+    heater = coordinator.heater
+    heater.voltage = 130  # type: ignore[attr-defined]
+    await coordinator.async_refresh()
+    assert coordinator.values is not None and coordinator.values.voltage == 13
+
+    jitter_writes = 0
+    for reading in (129, 130) * 5:
+        heater.voltage = reading  # type: ignore[attr-defined]
+        await coordinator.async_refresh()
+        jitter_writes += coordinator.has_changed("voltage")
+
+    heater.voltage = 120  # type: ignore[attr-defined]
+    updates = 0
+    while not coordinator.has_changed("voltage"):
+        assert updates < DEADBAND_HOLD_UPDATES
+        await coordinator.async_refresh()
+        updates += 1
+    record_benchmark(jitter_writes=jitter_writes, updates_to_publish_drop=updates)
+    assert jitter_writes == 0
+    assert updates == DEADBAND_HOLD_UPDATES
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+import hcalory_control.heater
+from homeassistant.components.number import NumberEntityDescription
+from homeassistant.components.switch import SwitchEntityDescription
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.simulator import SimulatedHeater, SimulationProfile
+from custom_components.hcalory_ble.apply import DesiredState
+from custom_components.hcalory_ble.coordinator import HcaloryCoordinator
+from custom_components.hcalory_ble.number import HcalorySettingNumber
+from custom_components.hcalory_ble.switch import HcalorySwitch
+
+
+async def bench_time_to_setpoint(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    make_entry: Callable[[HcaloryCoordinator], MockConfigEntry],
+    record_benchmark: Callable[..., None],
+) -> None:
+    coordinator = make_coordinator(SimulationProfile(latency=0.01, seed=1))
+    heater: SimulatedHeater = coordinator.heater  # type: ignore[assignment]
+    heater.setting = 60
+    await coordinator.async_refresh()
+    number = HcalorySettingNumber(
+        coordinator,
+        make_entry(coordinator),
+        NumberEntityDescription(key="heater_setting"),
+    )
+
+    started = time.monotonic()
+    await number.async_set_native_value(90.0)
+    elapsed = time.monotonic() - started
+
+    assert number.last_ramp is not None
+    assert number.last_ramp.reached
+    assert heater.setting == 90
+    record_benchmark(
+        elapsed=elapsed,
+        time_to_setpoint=number.last_ramp.duration,
+        commands=number.last_ramp.commands_sent,
+    )
+    # One command per degree and no more, and nowhere near the old 13+ seconds.
+    assert number.last_ramp.commands_sent == 30
+    assert elapsed < 2.0
+
+
+async def bench_setpoint_burst(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    make_entry: Callable[[HcaloryCoordinator], MockConfigEntry],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """Someone dragging the slider from 60 to 80, one degree at a time."""
+    coordinator = make_coordinator(SimulationProfile(latency=0.01, seed=1))
+    heater: SimulatedHeater = coordinator.heater  # type: ignore[assignment]
+    heater.setting = 60
+    await coordinator.async_refresh()
+    number = HcalorySettingNumber(
+        coordinator,
+        make_entry(coordinator),
+        NumberEntityDescription(key="heater_setting"),
+    )
+
+    started = time.monotonic()
+    calls = []
+    for target in range(61, 81):
+        calls.append(asyncio.create_task(number.async_set_native_value(float(target))))
+        await asyncio.sleep(0.005)
+    await asyncio.gather(*calls)
+    elapsed = time.monotonic() - started
+
+    assert heater.setting == 80
+    commands = heater.commands_received["up"] + heater.commands_received["down"]
+    record_benchmark(elapsed=elapsed, calls=len(calls), step_commands=commands)
+    # Twenty calls, but only twenty degrees to cover. Replaying each call's ramp from the start would be 210.
+    assert commands < 40
+    assert elapsed < 2.0
+
+
+async def bench_switch_latency(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    make_entry: Callable[[HcaloryCoordinator], MockConfigEntry],
+    record_benchmark: Callable[..., None],
+) -> None:
+    coordinator = make_coordinator(
+        SimulationProfile(latency=0.01, transition_time=0.02, seed=1)
+    )
+    await coordinator.async_refresh()
+    switch = HcalorySwitch(
+        coordinator,
+        make_entry(coordinator),
+        SwitchEntityDescription(key="heater_power"),
+    )
+
+    started = time.monotonic()
+    await switch.async_turn_on()
+    on_call = time.monotonic() - started
+    # The switch shows on straight away. This is how long the heater takes to back that up.
+    await coordinator.async_wait_for(lambda data: data.running, 10.0)
+    on_confirmed = time.monotonic() - started
+
+    started = time.monotonic()
+    await switch.async_turn_off()
+    off_call = time.monotonic() - started
+    await coordinator.async_wait_for(lambda data: not data.running, 10.0)
+    off_confirmed = time.monotonic() - started
+
+    record_benchmark(
+        on_call=on_call,
+        on_confirmed=on_confirmed,
+        off_call=off_call,
+        off_confirmed=off_confirmed,
+    )
+
+
+async def bench_apply_state(
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    record_benchmark: Callable[..., None],
+) -> None:
+    """ "On, thermostat mode, 72" from gear 3, all in one session."""
+    coordinator = make_coordinator(
+        SimulationProfile(latency=0.01, transition_time=0.02, seed=1)
+    )
+    heater: SimulatedHeater = coordinator.heater  # type: ignore[assignment]
+    heater.mode = hcalory_control.heater.HeaterMode.gear
+    heater.setting = 3
+    await coordinator.async_refresh()
+
+    started = time.monotonic()
+    result = await coordinator.async_apply_state(
+        DesiredState(
+            power=True, mode=hcalory_control.heater.HeaterMode.thermostat, setting=72
+        )
+    )
+    elapsed = time.monotonic() - started
+
+    assert heater.mode == hcalory_control.heater.HeaterMode.thermostat
+    assert heater.setting == 72
+    assert heater.commands_received["start_heat"] == 1
+    record_benchmark(
+        elapsed=elapsed,
+        commands=result.commands_sent,
+        reads=heater.commands_received["pump_data"],
+        verified=result.verified,
+    )
+    # Going again shouldn't send a thing.
+    again = await coordinator.async_apply_state(
+        DesiredState(
+            power=True, mode=hcalory_control.heater.HeaterMode.thermostat, setting=72
+        )
+    )
+    assert again.commands_sent == 0
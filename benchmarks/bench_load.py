@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from benchmarks.load import async_run_load
+from benchmarks.simulator import SimulatedHeater, SimulationProfile
+
+# Long enough to see a few watchdog polls is more like ten minutes. The default keeps `make bench` quick.
+SOAK_SECONDS = float(os.environ.get("HCALORY_SOAK_SECONDS", "5"))
+
+
+@pytest.mark.parametrize(
+    ("heaters", "proxies"),
+    [(10, 3), (50, 3)],
+    ids=["10-heaters", "50-heaters"],
+)
+async def bench_fleet_soak(
+    hass: HomeAssistant,
+    simulated_heaters: dict[str, SimulatedHeater],
+    record_benchmark: Callable[..., None],
+    heaters: int,
+    proxies: int,
+) -> None:
+    report = await async_run_load(
+        hass,
+        simulated_heaters,
+        heaters,
+        proxies,
+        SOAK_SECONDS,
+        SimulationProfile(latency=0.02, jitter=0.01, push_frames=True),
+    )
+    results = report.as_dict()
+    record_benchmark(**results)
+    # Whatever the radio is doing, the integration shouldn't be hogging Home Assistant's event loop.
+    assert results["loop_lag_p95"] is not None
+    assert results["loop_lag_p95"] < 0.1
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import hcalory_control.heater
+from homeassistant.core import HomeAssistant
+
+from benchmarks.replay import ReplayHeater
+from benchmarks.simulator import SimulatedHeater, SimulationProfile, simulated_device
+from custom_components.hcalory_ble.capture import Direction, read_capture
+from custom_components.hcalory_ble.coordinator import HcaloryCoordinator
+
+Command = hcalory_control.heater.Command
+HeaterState = hcalory_control.heater.HeaterState
+
+
+async def bench_capture_replay(
+    hass: HomeAssistant,
+    make_coordinator: Callable[..., HcaloryCoordinator],
+    simulated_heaters: dict[str, SimulatedHeater],
+    record_benchmark: Callable[..., None],
+    tmp_path: Path,
+) -> None:
+    """Capture a start, setpoint change and stop from a simulated heater, then play it back as fast as it'll go."""
+    coordinator = make_coordinator(
+        SimulationProfile(latency=0.005, transition_time=0.01, push_frames=True, seed=1)
+    )
+    path = tmp_path / "session.hcap"
+    coordinator.async_start_capture(path)
+    await coordinator.async_refresh()
+    await coordinator.pipeline.send_command(Command.start_heat)
+    await coordinator.async_wait_for(
+        lambda data: data.heater_state == HeaterState.running, 5.0
+    )
+    for _ in range(10):
+        await coordinator.pipeline.send_command(Command.up)
+    await coordinator.async_wait_for(lambda data: data.heater_setting == 80, 5.0)
+    await coordinator.pipeline.send_command(Command.stop_heat)
+    await coordinator.async_wait_for(
+        lambda data: data.heater_state == HeaterState.off, 5.0
+    )
+    await coordinator.async_stop_capture()
+
+    frames = await hass.async_add_executor_job(lambda: list(read_capture(path)))
+    capture_bytes = await hass.async_add_executor_job(lambda: path.stat().st_size)
+    received = [
+        frame.payload for frame in frames if frame.direction == Direction.RECEIVED
+    ]
+
+    started = time.perf_counter()
+    for payload in received:
+        hcalory_control.heater.HeaterResponse.unpack(payload)
+    decode = (time.perf_counter() - started) / len(received)
+
+    address = "AA:BB:CC:DD:EE:02"
+    name = "Replayed Heater"
+    heater = ReplayHeater(simulated_device(address, name), frames)
+    replayed = HcaloryCoordinator(hass, heater, address, name)
+    try:
+        started = time.perf_counter()
+        played = await heater.async_play(speed=0)
+        elapsed = time.perf_counter() - started
+        assert replayed.data is not None
+        assert (
+            replayed.data.asdict()
+            == hcalory_control.heater.HeaterResponse.unpack(received[-1]).asdict()
+        )
+    finally:
+        await replayed.async_shutdown()
+
+    assert heater.commands_captured["start_heat"] == 1
+    assert heater.commands_captured["up"] == 10
+    record_benchmark(
+        frames=len(frames),
+        bytes_per_frame=capture_bytes / len(frames),
+        decode_us=decode * 1e6,
+        replay_frames_per_second=played / elapsed,
+    )
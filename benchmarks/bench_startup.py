@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.simulator import SimulatedHeater, SimulationProfile, simulated_device
+from custom_components.hcalory_ble.const import DOMAIN
+from custom_components.hcalory_ble.snapshot import STORAGE_VERSION
+
+ROOT = Path(__file__).parent.parent
+# Home Assistant has all of these loaded long before it gets around to us, so they don't count against us.
+ALREADY_LOADED = (
+    "homeassistant.core",
+    "homeassistant.helpers.update_coordinator",
+    "homeassistant.components.bluetooth",
+    "homeassistant.components.number",
+    "homeassistant.components.select",
+    "homeassistant.components.sensor",
+    "homeassistant.components.switch",
+)
+OURS = (
+    "custom_components.hcalory_ble",
+    "custom_components.hcalory_ble.number",
+    "custom_components.hcalory_ble.select",
+    "custom_components.hcalory_ble.sensor",
+    "custom_components.hcalory_ble.switch",
+)
+IMPORT_RUNS = 5
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+for module in {already_loaded!r}:
+    importlib.import_module(module)
+started = time.perf_counter()
+for module in {ours!r}:
+    importlib.import_module(module)
+print(json.dumps({{
+    "seconds": time.perf_counter() - started,
+    "esphome_imported": "aioesphomeapi" in sys.modules,
+}}))
+"""
+
+
+def bench_import_time(record_benchmark: Callable[..., None]) -> None:
+    """How long importing the integration and its platforms takes, each time in a fresh interpreter."""
+    script = IMPORT_SCRIPT.format(already_loaded=ALREADY_LOADED, ours=OURS)
+    runs: list[dict[str, Any]] = []
+    for _ in range(IMPORT_RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=ROOT,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    seconds = sorted(run["seconds"] for run in runs)
+    record_benchmark(
+        import_median=seconds[len(seconds) // 2],
+        import_min=seconds[0],
+        esphome_imported=runs[0]["esphome_imported"],
+    )
+
+
+@pytest.mark.parametrize("restored", [False, True], ids=["fresh", "from-snapshot"])
+async def bench_setup_entry(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    simulated_heaters: dict[str, SimulatedHeater],
+    record_benchmark: Callable[..., None],
+    restored: bool,
+) -> None:
+    """Wall time for async_setup_entry against a heater that takes a realistic while to connect to."""
+    address = "AA:BB:CC:DD:EE:01"
+    heater = SimulatedHeater(
+        simulated_device(address),
+        SimulationProfile(latency=0.05, connect_time=1.0, seed=1),
+    )
+    simulated_heaters[address] = heater
+    # Nothing in the simulation needs the real adapters.
+    hass.config.components.add("bluetooth_adapters")
+    entry = MockConfigEntry(
+        domain=DOMAIN, data={CONF_ADDRESS: address}, unique_id=address
+    )
+    entry.add_to_hass(hass)
+    if restored:
+        hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+            "version": STORAGE_VERSION,
+            "minor_version": 1,
+            "key": f"{DOMAIN}.{entry.entry_id}",
+            "data": {"name": heater.device.name, "frame": heater.frame().hex()},
+        }
+
+    started = time.monotonic()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    elapsed = time.monotonic() - started
+    assert entry.state is ConfigEntryState.LOADED
+
+    record_benchmark(setup_entry=elapsed, connected=heater.is_connected)
+    if restored:
+        # Startup shouldn't be waiting on the heater at all.
+        assert elapsed < heater.profile.connect_time
+    await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import statistics
+from collections.abc import AsyncGenerator, Callable, Generator
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.simulator import SimulatedHeater, SimulationProfile, simulated_device
+from custom_components.hcalory_ble.const import DOMAIN
+from custom_components.hcalory_ble.coordinator import HcaloryCoordinator
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+_RESULTS: list[tuple[str, dict[str, Any]]] = []
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "p50": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, len(ordered) * 95 // 100)],
+        "max": ordered[-1],
+    }
+
+
+@pytest.fixture
+def record_benchmark(request: pytest.FixtureRequest) -> Callable[..., None]:
+    def record(**results: Any) -> None:
+        _RESULTS.append((request.node.name, results))
+
+    return record
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    if not _RESULTS:
+        return
+    terminalreporter.section("hcalory_ble benchmarks")
+    for name, results in _RESULTS:
+        formatted = ", ".join(
+            f"{key}={value:.4f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in results.items()
+        )
+        terminalreporter.write_line(f"{name}: {formatted}")
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    return
+
+
+@pytest.fixture
+def simulated_heaters() -> Generator[dict[str, SimulatedHeater]]:
+    """
+    Every simulated heater by address, with Home Assistant's Bluetooth lookups pointed at them.
+
+    There's no adapter here, so nothing is advertising and there are no stale connections to close. Heaters
+    behind a SimulatedProxy show up as being seen by that proxy, and every proxy in a heater's heard_by shows up as
+    a scanner that knows which heaters are connected through it.
+    """
+    heaters: dict[str, SimulatedHeater] = {}
+
+    def ble_device_from_address(
+        hass: HomeAssistant, address: str, connectable: bool = True
+    ) -> Any:
+        heater = heaters.get(address)
+        return heater.device if heater is not None else None
+
+    def last_service_info(
+        hass: HomeAssistant, address: str, connectable: bool = True
+    ) -> Any:
+        # The slot arbiter only wants to know which proxy a heater is behind.
+        heater = heaters.get(address)
+        if heater is None or heater.proxy is None:
+            return None
+        return SimpleNamespace(source=heater.proxy.name)
+
+    def current_scanners(hass: HomeAssistant) -> list[Any]:
+        proxies = {
+            proxy.name: proxy
+            for heater in heaters.values()
+            for proxy, _rssi in heater.heard_by.values()
+        }
+        return [
+            SimpleNamespace(
+                source=name,
+                get_allocations=lambda proxy=proxy: SimpleNamespace(
+                    allocated=sorted(proxy.connected)
+                ),
+            )
+            for name, proxy in proxies.items()
+        ]
+
+    with (
+        patch(
+            "homeassistant.components.bluetooth.async_ble_device_from_address",
+            side_effect=ble_device_from_address,
+        ),
+        patch(
+            "custom_components.hcalory_ble.async_ble_device_from_address",
+            side_effect=ble_device_from_address,
+        ),
+        patch(
+            "homeassistant.components.bluetooth.async_register_callback",
+            return_value=lambda: None,
+        ),
+        patch(
+            "homeassistant.components.bluetooth.async_last_service_info",
+            side_effect=last_service_info,
+        ),
+        patch(
+            "homeassistant.components.bluetooth.async_current_scanners",
+            side_effect=current_scanners,
+        ),
+        patch(
+            "custom_components.hcalory_ble.coordinator.close_stale_connections_by_address",
+            AsyncMock(),
+        ),
+        patch("bleak_retry_connector.close_stale_connections_by_address", AsyncMock()),
+        # Config entries get their heaters from here, so hand them the simulated one for that address.
+        patch(
+            "custom_components.hcalory_ble.connection.HcaloryHeater",
+            side_effect=lambda device: heaters[device.address],
+        ),
+    ):
+        yield heaters
+
+
+@pytest.fixture
+async def make_coordinator(
+    hass: HomeAssistant, simulated_heaters: dict[str, SimulatedHeater]
+) -> AsyncGenerator[Callable[..., HcaloryCoordinator]]:
+    coordinators: list[HcaloryCoordinator] = []
+
+    def make(
+        profile: SimulationProfile | None = None, address: str = "AA:BB:CC:DD:EE:01"
+    ) -> HcaloryCoordinator:
+        name = "Simulated Heater"
+        heater = SimulatedHeater(simulated_device(address, name), profile)
+        simulated_heaters[address] = heater
+        coordinator = HcaloryCoordinator(hass, heater, address, name)
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield make
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+
+
+@pytest.fixture
+def make_entry(hass: HomeAssistant) -> Callable[[HcaloryCoordinator], MockConfigEntry]:
+    def make(coordinator: HcaloryCoordinator) -> MockConfigEntry:
+        entry = MockConfigEntry(domain=DOMAIN, data={CONF_ADDRESS: coordinator.address})
+        entry.add_to_hass(hass)
+        entry.runtime_data = coordinator.heater
+        hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+        return entry
+
+    return make
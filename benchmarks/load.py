@@ -0,0 +1,191 @@
+"""Soak a whole fleet of simulated heaters through the real config entry setup, for capacity planning."""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import hcalory_control.heater
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from benchmarks.simulator import (
+    SimulatedHeater,
+    SimulatedProxy,
+    SimulationProfile,
+    simulated_device,
+)
+from custom_components.hcalory_ble.const import DOMAIN
+from custom_components.hcalory_ble.coordinator import HcaloryCoordinator
+
+# How often somebody walks up to one of the heaters and pokes its buttons.
+PRESS_INTERVAL = 0.25  # seconds
+LAG_PROBE_INTERVAL = 0.05  # seconds
+
+
+def _percentile(samples: list[float], percentile: int) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+
+
+@dataclasses.dataclass
+class LoadReport:
+    heaters: int
+    proxies: int
+    duration: float
+    # Entries that made it to LOADED, and how many heaters actually held a connection at the end.
+    loaded: int = 0
+    connected: int = 0
+    # Seconds from a heater changing to its coordinator having the change.
+    staleness: list[float] = dataclasses.field(default_factory=list)
+    # Changes the coordinator never caught up with before the run ended.
+    missed_changes: int = 0
+    operations: int = 0
+    failures: int = 0
+    refused_connections: int = 0
+    loop_lag: list[float] = dataclasses.field(default_factory=list)
+    memory_per_heater: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "heaters": self.heaters,
+            "proxies": self.proxies,
+            "loaded": self.loaded,
+            "connected": self.connected,
+            "staleness_p50": _percentile(self.staleness, 50),
+            "staleness_p95": _percentile(self.staleness, 95),
+            "missed_changes": self.missed_changes,
+            "failure_rate": self.failures / self.operations if self.operations else 0.0,
+            "refused_connections": self.refused_connections,
+            "loop_lag_p95": _percentile(self.loop_lag, 95),
+            "loop_lag_max": max(self.loop_lag, default=None),
+            "memory_per_heater_kib": self.memory_per_heater / 1024,
+        }
+
+
+async def _probe_loop_lag(report: LoadReport, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        report.loop_lag.append(time.monotonic() - started - LAG_PROBE_INTERVAL)
+
+
+async def _press_buttons(
+    heaters: list[SimulatedHeater],
+    pending: dict[str, tuple[int, float]],
+    report: LoadReport,
+    stop: asyncio.Event,
+    seed: int,
+) -> None:
+    chooser = random.Random(seed)
+    while not stop.is_set():
+        heater = chooser.choice(heaters)
+        heater.press(
+            chooser.choice(
+                (hcalory_control.heater.Command.up, hcalory_control.heater.Command.down)
+            )
+        )
+        if heater.device.address in pending:
+            report.missed_changes += 1
+        pending[heater.device.address] = (heater.setting, heater.changed_at)
+        await asyncio.sleep(PRESS_INTERVAL)
+
+
+async def async_run_load(
+    hass: HomeAssistant,
+    simulated_heaters: dict[str, SimulatedHeater],
+    heaters: int,
+    proxies: int,
+    duration: float,
+    profile: SimulationProfile | None = None,
+    slots_per_proxy: int = 3,
+    seed: int = 1,
+) -> LoadReport:
+    """
+    Set up `heaters` config entries spread across `proxies` simulated proxies and leave them running.
+
+    Meanwhile, somebody keeps changing the setting on random heaters from the heater itself. How long each
+    change takes to show up in the coordinator is the staleness we report.
+    """
+    report = LoadReport(heaters=heaters, proxies=proxies, duration=duration)
+    simulated_proxies = [
+        SimulatedProxy(f"proxy-{index}", slots_per_proxy) for index in range(proxies)
+    ]
+    # Nothing in the simulation needs the real adapters.
+    hass.config.components.add("bluetooth_adapters")
+
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    entries = []
+    for index in range(heaters):
+        address = f"AA:BB:CC:00:{index // 256:02X}:{index % 256:02X}"
+        simulated_heaters[address] = SimulatedHeater(
+            simulated_device(address, f"Heater {index}"),
+            dataclasses.replace(profile or SimulationProfile(), seed=seed + index),
+            simulated_proxies[index % proxies],
+        )
+        entry = MockConfigEntry(
+            domain=DOMAIN, data={CONF_ADDRESS: address}, unique_id=address
+        )
+        entry.add_to_hass(hass)
+        entries.append(entry)
+    await asyncio.gather(
+        *(hass.config_entries.async_setup(entry.entry_id) for entry in entries)
+    )
+
+    pending: dict[str, tuple[int, float]] = {}
+
+    def watch(coordinator: HcaloryCoordinator) -> Callable[[], None]:
+        def update() -> None:
+            change = pending.get(coordinator.address)
+            if change is None or coordinator.data is None:
+                return
+            setting, changed_at = change
+            if coordinator.data.heater_setting == setting:
+                report.staleness.append(time.monotonic() - changed_at)
+                del pending[coordinator.address]
+
+        return coordinator.async_add_listener(update)
+
+    unwatch = [watch(coordinator) for coordinator in hass.data.get(DOMAIN, {}).values()]
+
+    stop = asyncio.Event()
+    tasks = [
+        asyncio.create_task(_probe_loop_lag(report, stop)),
+        asyncio.create_task(
+            _press_buttons(
+                list(simulated_heaters.values()), pending, report, stop, seed
+            )
+        ),
+    ]
+    await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report.memory_per_heater = (current - baseline) / heaters
+    report.missed_changes += len(pending)
+    report.loaded = sum(entry.state is ConfigEntryState.LOADED for entry in entries)
+    report.connected = sum(heater.is_connected for heater in simulated_heaters.values())
+    report.refused_connections = sum(proxy.refused for proxy in simulated_proxies)
+    for heater in simulated_heaters.values():
+        for stats in heater.stats.operations.values():
+            report.operations += stats.count
+            report.failures += stats.failures
+
+    for remove_listener in unwatch:
+        remove_listener()
+    for entry in entries:
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+    return report
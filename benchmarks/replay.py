@@ -0,0 +1,100 @@
+"""Play a raw frame capture back through the integration, no heater required."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import time
+from collections.abc import Iterable
+
+import bleak
+import hcalory_control.heater
+
+from custom_components.hcalory_ble.capture import CapturedFrame, Direction
+from custom_components.hcalory_ble.heater import HcaloryHeater
+
+
+class ReplayHeater(HcaloryHeater):
+    """
+    HcaloryHeater that says whatever a capture says the real heater said, when it said it.
+
+    async_play() feeds the captured frames through data_pump_handler, so the frame listeners, the coordinator and
+    the entities on top of it all see them exactly as they'd see the real thing. Anything the integration asks for
+    in the meantime gets the most recent captured frame as its answer. Commands go nowhere, but are counted so they
+    can be held up against what was sent in the capture.
+    """
+
+    def __init__(
+        self, device: bleak.BLEDevice, frames: Iterable[CapturedFrame]
+    ) -> None:
+        super().__init__(device)
+        self.frames: list[CapturedFrame] = list(frames)
+        self.connected = False
+        self.commands_received: collections.Counter[str] = collections.Counter()
+        # What was sent to the real heater while the capture was running, by command name.
+        self.commands_captured: collections.Counter[str] = collections.Counter()
+        for frame in self.frames:
+            if frame.direction == Direction.SENT:
+                try:
+                    command = hcalory_control.heater.Command(frame.payload)
+                except ValueError:
+                    self.commands_captured["unknown"] += 1
+                else:
+                    self.commands_captured[command.name] += 1
+        # Until async_play gets going, the heater looks however it did when the capture started.
+        self._last: bytes | None = next(
+            (
+                frame.payload
+                for frame in self.frames
+                if frame.direction == Direction.RECEIVED
+            ),
+            None,
+        )
+        self._answers: set[asyncio.Task[None]] = set()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def _ensure_connection(self, connection_reason: str = "") -> None:
+        self.connected = True
+
+    async def disconnect(self) -> None:
+        self._intentional_disconnect = True
+        was_connected, self.connected = self.connected, False
+        if was_connected:
+            self.handle_disconnect(None)  # type: ignore[arg-type]
+
+    async def send_command(self, command: hcalory_control.heater.Command) -> None:
+        self.commands_received[command.name] += 1
+        if (
+            command == hcalory_control.heater.Command.pump_data
+            and self._last is not None
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self.data_pump_handler(None, bytearray(self._last))  # type: ignore[arg-type]
+            )
+            self._answers.add(task)
+            task.add_done_callback(self._answers.discard)
+
+    async def async_play(self, speed: float = 1.0) -> int:
+        """
+        Feed every received frame through, spaced out like the capture at speed times real time.
+
+        A speed of 0 skips the waiting altogether. Returns how many frames went through.
+        """
+        received = [
+            frame for frame in self.frames if frame.direction == Direction.RECEIVED
+        ]
+        if not received:
+            return 0
+        started = time.monotonic()
+        first_at = received[0].at
+        for frame in received:
+            if speed > 0:
+                due = (frame.at - first_at) / speed - (time.monotonic() - started)
+                if due > 0:
+                    await asyncio.sleep(due)
+            self._last = frame.payload
+            await self.data_pump_handler(None, bytearray(frame.payload))  # type: ignore[arg-type]
+        return len(received)
@@ -0,0 +1,281 @@
+"""An in-memory stand-in for a Hcalory heater, so the integration can be exercised without the hardware."""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import dataclasses
+import random
+import time
+from collections.abc import Coroutine
+from typing import Any
+
+import bleak
+import hcalory_control.heater
+from bleak import BleakError
+
+from custom_components.hcalory_ble.capture import Direction
+from custom_components.hcalory_ble.heater import HcaloryHeater
+
+HeaterState = hcalory_control.heater.HeaterState
+HeaterMode = hcalory_control.heater.HeaterMode
+Command = hcalory_control.heater.Command
+
+IGNITION_SEQUENCE: tuple[HeaterState, ...] = (
+    HeaterState.ignition_received,
+    HeaterState.ignition_starting,
+    HeaterState.igniting,
+    HeaterState.heating,
+    HeaterState.running,
+)
+COOLDOWN_SEQUENCE: tuple[HeaterState, ...] = (
+    HeaterState.cooldown_received,
+    HeaterState.cooldown_starting,
+    HeaterState.cooldown,
+    HeaterState.off,
+)
+SETTING_LIMITS: dict[HeaterMode, tuple[int, int]] = {
+    HeaterMode.thermostat: (1, 104),
+    HeaterMode.gear: (1, 6),
+}
+
+
+@dataclasses.dataclass
+class SimulationProfile:
+    # Seconds for a write to reach the heater, and for a reply to come back.
+    latency: float = 0.01
+    # Up to this many extra seconds, picked at random, on top of latency.
+    jitter: float = 0.0
+    # Chance that a command (or the reply to a pump_data) never makes it.
+    loss: float = 0.0
+    # Chance that a write knocks the connection over instead of going through.
+    disconnect_rate: float = 0.0
+    connect_time: float = 0.05
+    # Seconds the heater spends in each step of ignition and cooldown.
+    transition_time: float = 0.05
+    # Whether the heater sends a frame on its own every time its state changes.
+    push_frames: bool = False
+    seed: int | None = None
+
+
+class SimulatedProxy:
+    """
+    An ESPHome Bluetooth proxy: a handful of connection slots and one radio that everyone has to share.
+
+    Heaters behind a proxy can't connect once its slots are used up, and their writes and replies queue up
+    behind each other on the radio instead of all happening at once.
+    """
+
+    def __init__(self, name: str, slots: int = 3, latency: float = 0.0) -> None:
+        self.name = name
+        self.slots = slots
+        # Extra seconds every write and reply spends getting through this proxy.
+        self.latency = latency
+        self.connected: set[str] = set()
+        self.radio = asyncio.Lock()
+        self.refused = 0
+
+    def connect(self, address: str) -> bool:
+        if address not in self.connected and len(self.connected) >= self.slots:
+            self.refused += 1
+            return False
+        self.connected.add(address)
+        return True
+
+    def release(self, address: str) -> None:
+        self.connected.discard(address)
+
+
+def simulated_device(
+    address: str, name: str | None = "Simulated Heater"
+) -> bleak.BLEDevice:
+    # rssi as a keyword, so this works with bleak before 1.0, which requires it, and after, which ignores it.
+    return bleak.BLEDevice(address, name, None, rssi=-127)
+
+
+class SimulatedHeater(HcaloryHeater):
+    """
+    HcaloryHeater with the Bluetooth part swapped out for a little state machine.
+
+    Everything above the radio (the frame queue, frame listeners, stats) is the real code. Commands take
+    profile.latency to land, replies take as long again to come back through data_pump_handler, and both can be
+    lost or drop the connection according to the profile.
+    """
+
+    def __init__(
+        self,
+        device: bleak.BLEDevice,
+        profile: SimulationProfile | None = None,
+        proxy: SimulatedProxy | None = None,
+    ) -> None:
+        super().__init__(device)
+        self.profile = profile or SimulationProfile()
+        self.proxy = proxy
+        # Every proxy that can hear this heater by name, and how loud. Like Home Assistant, connecting goes through
+        # the loudest of them with a free slot, whatever device says.
+        self.heard_by: dict[str, tuple[SimulatedProxy, int]] = {}
+        if proxy is not None:
+            self.heard_by[proxy.name] = (proxy, -60)
+        self._random = random.Random(self.profile.seed)
+        self.connected = False
+        self.connects = 0
+        # Commands that reached the heater (lost ones included), by name.
+        self.commands_received: collections.Counter[str] = collections.Counter()
+        self.state = HeaterState.off
+        self.mode = HeaterMode.thermostat
+        self.setting = 70
+        # Tenths of a volt and tenths of a degree, same as the heater sends them.
+        self.voltage = 125
+        self.body_temperature = 700
+        self.ambient_temperature = 650
+        self._transition: asyncio.Task[None] | None = None
+        # Replies and state transitions still in flight, so disconnect() can clean them up.
+        self._tasks: set[asyncio.Task[None]] = set()
+        # time.monotonic() of the last time the heater's state changed.
+        self.changed_at: float = time.monotonic()
+
+    @property
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def frame(self) -> bytes:
+        return (
+            bytes(20)
+            + bytes((self.state, self.mode, self.setting, 0, 0, self.voltage, 0))
+            + self.body_temperature.to_bytes(2, "big")
+            + b"\x00"
+            + self.ambient_temperature.to_bytes(2, "big")
+            + bytes(7)
+        )
+
+    def drop_connection(self) -> None:
+        """Lose the link the way a flaky proxy would."""
+        if not self.connected:
+            return
+        self.connected = False
+        if self.proxy is not None:
+            self.proxy.release(self.device.address)
+        self._intentional_disconnect = False
+        self.handle_disconnect(None)  # type: ignore[arg-type]
+
+    async def disconnect(self) -> None:
+        self._intentional_disconnect = True
+        was_connected, self.connected = self.connected, False
+        if self.proxy is not None:
+            self.proxy.release(self.device.address)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Bleak calls the disconnected callback for disconnects we asked for too.
+        if was_connected:
+            self.handle_disconnect(None)  # type: ignore[arg-type]
+
+    async def _ensure_connection(self, connection_reason: str = "") -> None:
+        if self.connected:
+            return
+        async with self._connect_lock:
+            if self.connected:
+                return
+            if self.heard_by:
+                self.proxy = self._pick_proxy()
+            with self.stats.time("connect"):
+                await asyncio.sleep(self.profile.connect_time)
+                if self.proxy is not None and not self.proxy.connect(
+                    self.device.address
+                ):
+                    raise BleakError(
+                        f"Simulated proxy {self.proxy.name} is out of connection slots"
+                    )
+            self.connected = True
+            self.connects += 1
+            self._reconnect_event.set()
+
+    def _pick_proxy(self) -> SimulatedProxy:
+        ranked = sorted(
+            self.heard_by.values(), key=lambda heard: heard[1], reverse=True
+        )
+        for proxy, _rssi in ranked:
+            if (
+                self.device.address in proxy.connected
+                or len(proxy.connected) < proxy.slots
+            ):
+                return proxy
+        return ranked[0][0]
+
+    async def send_command(self, command: hcalory_control.heater.Command) -> None:
+        async with self._command_lock:
+            await self._ensure_connection(f"Sending command {command.name}")
+            await self._radio_delay()
+            if not self.connected:
+                raise BleakError("Simulated heater disconnected mid-write")
+            if self._random.random() < self.profile.disconnect_rate:
+                self.drop_connection()
+                raise BleakError("Simulated connection drop")
+            self.commands_received[command.name] += 1
+            self._capture(Direction.SENT, command)
+            if self._random.random() < self.profile.loss:
+                return
+            self._apply(command)
+
+    def press(self, command: hcalory_control.heater.Command) -> None:
+        """Change the heater from its own buttons, without any Bluetooth involved."""
+        self._apply(command)
+
+    async def _radio_delay(self) -> None:
+        delay = self.profile.latency + self._random.random() * self.profile.jitter
+        if self.proxy is None:
+            await asyncio.sleep(delay)
+            return
+        delay += self.proxy.latency
+        async with self.proxy.radio:
+            await asyncio.sleep(delay)
+
+    def _apply(self, command: hcalory_control.heater.Command) -> None:
+        match command:
+            case Command.pump_data:
+                self._spawn(self._reply())
+                return
+            case Command.start_heat if self.state in (
+                HeaterState.off,
+                *COOLDOWN_SEQUENCE,
+            ):
+                self._run_sequence(IGNITION_SEQUENCE)
+            case Command.stop_heat if self.state in IGNITION_SEQUENCE:
+                self._run_sequence(COOLDOWN_SEQUENCE)
+            case Command.thermostat:
+                self.mode = HeaterMode.thermostat
+            case Command.gear:
+                self.mode = HeaterMode.gear
+            case Command.up | Command.down:
+                lowest, highest = SETTING_LIMITS.get(self.mode, (1, 104))
+                step = 1 if command == Command.up else -1
+                self.setting = max(lowest, min(highest, self.setting + step))
+        self._changed()
+
+    def _run_sequence(self, sequence: tuple[HeaterState, ...]) -> None:
+        if self._transition is not None:
+            self._transition.cancel()
+        self._transition = self._spawn(self._async_sequence(sequence))
+
+    async def _async_sequence(self, sequence: tuple[HeaterState, ...]) -> None:
+        for state in sequence:
+            self.state = state
+            self._changed()
+            await asyncio.sleep(self.profile.transition_time)
+
+    def _changed(self) -> None:
+        self.changed_at = time.monotonic()
+        if self.profile.push_frames:
+            self._spawn(self._reply())
+
+    def _spawn(self, coroutine: Coroutine[Any, Any, None]) -> asyncio.Task[None]:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _reply(self) -> None:
+        await self._radio_delay()
+        if not self.connected or self._random.random() < self.profile.loss:
+            return
+        await self.data_pump_handler(None, bytearray(self.frame()))  # type: ignore[arg-type]
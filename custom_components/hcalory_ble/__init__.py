@@ -7,13 +7,19 @@ import bleak_retry_connector
 import hcalory_control.heater
 import homeassistant.components.bluetooth
 import homeassistant.exceptions
+import homeassistant.helpers.config_validation as cv
 from homeassistant.components.bluetooth import async_ble_device_from_address
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ADDRESS, Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.typing import ConfigType
 
+from .connection import async_get_connections
 from .const import DOMAIN, LOGGER
 from .coordinator import HcaloryCoordinator
+from .errors import read_errors
+from .services import async_setup_services
+from .snapshot import HeaterSnapshotStore
 
 PLATFORMS: list[Platform] = [
     Platform.SENSOR,
@@ -21,6 +27,12 @@ PLATFORMS: list[Platform] = [
     Platform.SWITCH,
     Platform.NUMBER,
 ]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(
@@ -28,10 +40,10 @@ async def async_setup_entry(
 ) -> bool:
     mac_address = entry.data[CONF_ADDRESS]
     LOGGER.debug("(%s) Setting up device", mac_address)
-    mac_address = entry.data[CONF_ADDRESS]
-    LOGGER.debug("(%s) Closing any stale connections", mac_address)
-    await bleak_retry_connector.close_stale_connections_by_address(mac_address)
-    LOGGER.debug("(%s) Attempting to connect", mac_address)
+    connections = async_get_connections(hass)
+    snapshots = HeaterSnapshotStore(hass, entry.entry_id)
+    if (snapshot := await snapshots.async_load()) is not None:
+        return await _async_setup_restored(hass, entry, snapshots, *snapshot)
     try:
         ble_device = async_ble_device_from_address(hass, mac_address, connectable=True)
         if ble_device is None:
@@ -49,24 +61,80 @@ async def async_setup_entry(
             raise homeassistant.exceptions.ConfigEntryNotReady(
                 f"Device with address {mac_address} didn't give us a name. A heater needs a name."
             )
-        device = hcalory_control.heater.HCaloryHeater(ble_device)
-        await device.get_data()
+        device = connections.async_claim(ble_device)
     except (TimeoutError, bleak.BleakError) as e:
         raise homeassistant.exceptions.ConfigEntryNotReady(
             f"Unable to connect to device {mac_address}"
         ) from e
-    LOGGER.debug("(%s) Connected and paired", mac_address)
-    entry.runtime_data = device
     device_name = ble_device.name
     if device_name is None:
         raise homeassistant.exceptions.ConfigEntryNotReady(
             f"Device with address {mac_address} unaccountably _still_ didn't give us a name. A. Device. Needs. A. Name."
         )
-    _coordinator = HcaloryCoordinator(hass, device, mac_address, device_name)
+    _coordinator = HcaloryCoordinator(hass, device, mac_address, device_name, snapshots)
+    errors: tuple[type[Exception], ...] = read_errors()
+    try:
+        if device.is_connected and device.heater_response is not None:
+            # Straight out of the config flow, still connected and with a fresh frame. No need to do it all again.
+            LOGGER.debug("(%s) Reusing connection from config flow", mac_address)
+        else:
+            LOGGER.debug("(%s) Closing any stale connections", mac_address)
+            await bleak_retry_connector.close_stale_connections_by_address(mac_address)
+            LOGGER.debug("(%s) Attempting to connect", mac_address)
+            # Through the pipeline, so we wait our turn for a slot on the proxy like everyone else.
+            await _coordinator.pipeline.get_data()
+    except errors as e:
+        await _coordinator.async_shutdown()
+        raise homeassistant.exceptions.ConfigEntryNotReady(
+            f"Unable to connect to device {mac_address}"
+        ) from e
+    except BaseException:
+        # Whatever went wrong, the coordinator's timers and callbacks can't outlive the setup that failed.
+        await _coordinator.async_shutdown()
+        raise
+    LOGGER.debug("(%s) Connected and paired", mac_address)
+    entry.runtime_data = device
+    assert device.heater_response is not None
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = _coordinator
+    # We just read a frame while connecting, so that's our first refresh. Polling again right away would only
+    # cost another round trip for the same data.
+    _coordinator.async_set_updated_data(device.heater_response)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    return True
+
+
+async def _async_setup_restored(
+    hass: HomeAssistant,
+    entry: ConfigEntry[hcalory_control.heater.HCaloryHeater],
+    snapshots: HeaterSnapshotStore,
+    device_name: str,
+    data: hcalory_control.heater.HeaterResponse,
+) -> bool:
+    """
+    Load the entry straight from the last snapshot and leave connecting to the coordinator.
+
+    Waiting on a connection here holds up Home Assistant's startup, and a heater that's out of range would
+    just fail setup anyway.
+    """
+    mac_address = entry.data[CONF_ADDRESS]
+    LOGGER.debug("(%s) Starting up from snapshot", mac_address)
+    ble_device = async_ble_device_from_address(hass, mac_address, connectable=True)
+    if ble_device is None:
+        # We haven't heard from the heater yet this boot. The coordinator swaps in the real BLEDevice once
+        # it shows up. bleak before 1.0 insists on an rssi, later ones ignore it, so it goes in as a keyword.
+        ble_device = bleak.BLEDevice(mac_address, device_name, None, rssi=-127)
+    device = async_get_connections(hass).async_claim(ble_device)
+    entry.runtime_data = device
+    _coordinator = HcaloryCoordinator(hass, device, mac_address, device_name, snapshots)
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = _coordinator
+    _coordinator.async_restore(data)
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    await _coordinator.async_config_entry_first_refresh()
+    entry.async_create_background_task(
+        hass, _coordinator.async_refresh(), f"{DOMAIN} {mac_address} connect"
+    )
 
     return True
 
@@ -75,7 +143,12 @@ async def async_unload_entry(
     hass: HomeAssistant, entry: ConfigEntry[hcalory_control.heater.HCaloryHeater]
 ) -> bool:
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        heater: hcalory_control.heater.HCaloryHeater = entry.runtime_data
-        await heater.disconnect()
+        await async_get_connections(hass).async_release(entry.data[CONF_ADDRESS])
 
     return unload_ok
+
+
+async def async_remove_entry(
+    hass: HomeAssistant, entry: ConfigEntry[hcalory_control.heater.HCaloryHeater]
+) -> None:
+    await HeaterSnapshotStore(hass, entry.entry_id).async_remove()
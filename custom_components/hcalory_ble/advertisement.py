@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import dataclasses
+import time
+
+from homeassistant.components import bluetooth
+
+from .const import MANUFACTURER_BLE_ID
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class AdvertisedState:
+    """
+    What a heater's advertisements tell us without connecting to it.
+
+    Nobody has worked out what (if anything) the heater packs into its manufacturer data, and a full status
+    frame is bigger than an advertisement can hold anyway. So we don't pretend to decode temperatures out of
+    it. What we can get is that the heater is alive, how well we hear it, through which adapter, and whether
+    its payload changed, which is a good hint that something about the heater did too.
+    """
+
+    rssi: int
+    source: str
+    payload: bytes | None
+    # time.monotonic() when we heard it.
+    seen_at: float
+
+
+def decode_advertisement(
+    service_info: bluetooth.BluetoothServiceInfoBleak,
+) -> AdvertisedState:
+    return AdvertisedState(
+        rssi=service_info.rssi,
+        source=service_info.source,
+        payload=service_info.manufacturer_data.get(MANUFACTURER_BLE_ID),
+        seen_at=time.monotonic(),
+    )
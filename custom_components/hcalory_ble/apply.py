@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from typing import Any
+
+import hcalory_control.heater
+
+from .const import LOGGER
+from .heater import HcaloryHeater
+from .ramp import async_ramp_setpoint
+
+HeaterMode = hcalory_control.heater.HeaterMode
+Command = hcalory_control.heater.Command
+
+# What the setting means depends on the mode: degrees in thermostat mode, a 1-6 power level in gear mode.
+SETTING_RANGES: dict[HeaterMode, tuple[int, int]] = {
+    HeaterMode.thermostat: (1, 104),
+    HeaterMode.gear: (1, 6),
+}
+# The command that switches the heater into each mode. Every other mode is one the heater ends up in on its own.
+MODE_COMMANDS: dict[HeaterMode, Command] = {
+    HeaterMode.thermostat: Command.thermostat,
+    HeaterMode.gear: Command.gear,
+}
+APPLY_TIMEOUT = 60.0
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class DesiredState:
+    """How somebody wants the heater to end up. Anything left as None stays however it is."""
+
+    power: bool | None = None
+    mode: HeaterMode | None = None
+    setting: int | None = None
+
+    def satisfied_by(self, data: hcalory_control.heater.HeaterResponse) -> bool:
+        return (
+            (self.power is None or data.running == self.power)
+            and (self.mode is None or data.heater_mode == self.mode)
+            and (self.setting is None or data.heater_setting == self.setting)
+        )
+
+    def changes(self, data: hcalory_control.heater.HeaterResponse) -> dict[str, Any]:
+        """The HeaterResponse fields that'd be different once data got to this state."""
+        changes: dict[str, Any] = {}
+        if self.mode is not None:
+            changes["heater_mode"] = self.mode
+        if self.setting is not None:
+            changes["heater_setting"] = self.setting
+        if self.power is not None and data.running != self.power:
+            changes["heater_state"] = (
+                hcalory_control.heater.HeaterState.ignition_received
+                if self.power
+                else hcalory_control.heater.HeaterState.cooldown_received
+            )
+        return changes
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ApplyPlan:
+    # Sent first, then the setting is ramped (if it needs to be), then after is sent.
+    before: tuple[Command, ...]
+    setting: int | None
+    after: tuple[Command, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class ApplyResult:
+    plan: ApplyPlan
+    commands_sent: int
+    # The frame we read at the very end, and whether it already shows everything we asked for.
+    data: hcalory_control.heater.HeaterResponse
+    verified: bool
+    duration: float
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "commands_sent": self.commands_sent,
+            "verified": self.verified,
+            "duration": round(self.duration, 3),
+            "data": self.data.asdict(),
+        }
+
+
+def plan_commands(
+    current: hcalory_control.heater.HeaterResponse, desired: DesiredState
+) -> ApplyPlan:
+    """
+    The fewest commands that get the heater from current to desired.
+
+    Stopping goes first and starting goes last, so a heater that's being turned on starts up in the right mode
+    at the right setting. The mode goes before the setting because it changes what the setting means.
+    """
+    before: list[Command] = []
+    after: list[Command] = []
+    if desired.power is False and current.running:
+        before.append(Command.stop_heat)
+    mode_changing = False
+    if desired.mode is not None and current.heater_mode != desired.mode:
+        if desired.mode not in MODE_COMMANDS:
+            raise ValueError(
+                f"The heater can't be switched to {desired.mode.name} mode"
+            )
+        before.append(MODE_COMMANDS[desired.mode])
+        mode_changing = True
+    setting = None
+    if desired.setting is not None and (
+        mode_changing or current.heater_setting != desired.setting
+    ):
+        setting = desired.setting
+    if desired.power is True and not current.running:
+        after.append(Command.start_heat)
+    return ApplyPlan(tuple(before), setting, tuple(after))
+
+
+async def async_apply_state(
+    heater: HcaloryHeater, desired: DesiredState
+) -> ApplyResult:
+    """
+    Read the heater once, send whatever it takes to get it to desired, then read it once more to check.
+
+    Expects to be run inside a pipeline session, same as async_ramp_setpoint. Whether the heater has actually
+    started or stopped by the final read is down to how quick it's feeling, so verified being False doesn't
+    have to mean anything went wrong.
+    """
+    started = time.monotonic()
+    commands_sent = 0
+    async with asyncio.timeout(APPLY_TIMEOUT):
+        plan = plan_commands(await heater.get_data(), desired)
+        LOGGER.debug(
+            "(%s) Applying %s: sending %s, ramping to %s, then sending %s",
+            heater.device.address,
+            desired,
+            [command.name for command in plan.before],
+            plan.setting,
+            [command.name for command in plan.after],
+        )
+        for command in plan.before:
+            await heater.send_command(command)
+            commands_sent += 1
+        if plan.setting is not None:
+            setting = plan.setting
+            ramp = await async_ramp_setpoint(heater, lambda: setting)
+            commands_sent += ramp.commands_sent
+        for command in plan.after:
+            await heater.send_command(command)
+            commands_sent += 1
+        data = await heater.get_data()
+    return ApplyResult(
+        plan=plan,
+        commands_sent=commands_sent,
+        data=data,
+        verified=desired.satisfied_by(data),
+        duration=time.monotonic() - started,
+    )
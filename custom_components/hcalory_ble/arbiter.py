@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components import bluetooth
+from homeassistant.core import HomeAssistant, callback
+
+from .const import ADAPTER_CONNECTION_SLOTS, DOMAIN, LOGGER
+from .heater import HcaloryHeater
+
+ARBITER_KEY = f"{DOMAIN}_arbiter"
+# Each heater's first scheduled poll is pushed back by up to this much, so a dozen of them set up at the same time
+# don't keep hitting the same proxy in the same instant forever after.
+STAGGER_WINDOW = 5.0  # seconds
+# Multiplying by this and keeping the fractional part spreads any number of heaters pretty evenly over the
+# window without having to know how many there will be.
+_GOLDEN_RATIO = 0.6180339887
+# A heater waiting on a full adapter looks again this often even if nobody told it a slot came free, in case a
+# heater we're counting as connected went away without us hearing about it, or turned down giving its slot up.
+SLOT_RECHECK_INTERVAL = 1.0  # seconds
+
+# Asked to disconnect so somebody else can have the slot. True if it did.
+SlotReleaser = Callable[[], Awaitable[bool]]
+
+
+@dataclasses.dataclass
+class AdapterUsage:
+    slots: int
+    active: int = 0
+    waiting: int = 0
+    busy_seconds: float = 0.0
+    max_wait: float = 0.0
+    handovers: int = 0
+    since: float = dataclasses.field(default_factory=time.monotonic)
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of the adapter's slot-time spent connected to heaters since we started keeping track."""
+        elapsed = time.monotonic() - self.since
+        if elapsed <= 0:
+            return 0.0
+        return self.busy_seconds / (self.slots * elapsed)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_wait": round(self.max_wait, 3),
+            "handovers": self.handovers,
+            "utilization": round(self.utilization, 3),
+        }
+
+
+@dataclasses.dataclass
+class _Lease:
+    """A slot on an adapter, held by a heater from the time it starts connecting until it disconnects."""
+
+    adapter: str
+    heater: HcaloryHeater
+    granted_at: float = dataclasses.field(default_factory=time.monotonic)
+    # Sessions running on the connection right now, and when the last one finished.
+    in_use: int = 0
+    idle_since: float = dataclasses.field(default_factory=time.monotonic)
+    reclaiming: bool = False
+    remove_listener: Callable[[], None] | None = None
+
+
+class SlotArbiter:
+    """
+    Shares each Bluetooth adapter's (or proxy's) connection slots between every heater behind it.
+
+    A slot is taken by the first session that needs to connect, and held for as long as the heater stays
+    connected, because that's what the proxy counts. A heater that finds its adapter full waits for a slot, and
+    meanwhile asks whoever has sat idle on theirs the longest to let go of it. Once the fleet outgrows the slots
+    that means heaters take turns at the cost of a reconnect, rather than whoever got there last never getting in.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._leases: dict[str, _Lease] = {}
+        self._releasers: dict[str, SlotReleaser] = {}
+        self._waiters: dict[str, list[asyncio.Future[None]]] = {}
+        self._usage: dict[str, AdapterUsage] = {}
+        self._registered: list[str] = []
+        # Which adapter each heater we're connected to is actually connected through, once we know.
+        self._paths: dict[str, str] = {}
+
+    @callback
+    def async_register(
+        self, address: str, release: SlotReleaser | None = None
+    ) -> timedelta:
+        """
+        Start tracking a heater, and hand back how far its first poll should be pushed back from everyone else's.
+
+        release is called when another heater is waiting on the slot this one is sitting on.
+        """
+        if address not in self._registered:
+            self._registered.append(address)
+        if release is not None:
+            self._releasers[address] = release
+        index = self._registered.index(address)
+        return timedelta(seconds=(index * _GOLDEN_RATIO) % 1 * STAGGER_WINDOW)
+
+    @callback
+    def async_unregister(self, address: str) -> None:
+        if address in self._registered:
+            self._registered.remove(address)
+        self._releasers.pop(address, None)
+        self._paths.pop(address, None)
+        self._release(address)
+
+    @callback
+    def async_set_path(self, address: str, adapter: str | None) -> None:
+        """Note which adapter a heater is connected through, or that it isn't holding a connection anywhere."""
+        if adapter is None:
+            self._paths.pop(address, None)
+            return
+        self._paths[address] = adapter
+        lease = self._leases.get(address)
+        if lease is None or lease.adapter == adapter:
+            return
+        # Home Assistant connected it somewhere other than where we guessed. Count the slot where it really is.
+        now = time.monotonic()
+        previous = self._usage[lease.adapter]
+        previous.active -= 1
+        previous.busy_seconds += now - lease.granted_at
+        self._usage_for(adapter).active += 1
+        guessed, lease.adapter, lease.granted_at = lease.adapter, adapter, now
+        self._wake(guessed)
+
+    @callback
+    def async_adapter_for(self, address: str) -> str:
+        if (path := self._paths.get(address)) is not None:
+            return path
+        service_info = bluetooth.async_last_service_info(
+            self.hass, address, connectable=True
+        )
+        if service_info is None:
+            return "unknown"
+        return service_info.source
+
+    @asynccontextmanager
+    async def slot(self, heater: HcaloryHeater) -> AsyncIterator[str]:
+        address = heater.device.address
+        lease = self._leases.get(address)
+        if lease is None:
+            lease = await self._async_acquire(heater)
+        lease.in_use += 1
+        try:
+            yield lease.adapter
+        finally:
+            lease.in_use -= 1
+            lease.idle_since = time.monotonic()
+            # Nothing to hold on to if the session never got a connection, or lost it.
+            if lease.in_use == 0 and not heater.is_connected:
+                self._release(address, lease)
+
+    async def _async_acquire(self, heater: HcaloryHeater) -> _Lease:
+        address = heater.device.address
+        adapter = self.async_adapter_for(address)
+        usage = self._usage_for(adapter)
+        queued_at = time.monotonic()
+        usage.waiting += 1
+        try:
+            # A heater that's already connected (straight out of the config flow, say) already has its slot.
+            while not heater.is_connected and self._held(adapter) >= usage.slots:
+                if (victim := self._idle_lease(adapter)) is not None:
+                    victim.reclaiming = True
+                    self.hass.async_create_background_task(
+                        self._async_reclaim(victim, address),
+                        f"{DOMAIN} reclaim slot on {adapter}",
+                    )
+                waiter: asyncio.Future[None] = self.hass.loop.create_future()
+                self._waiters.setdefault(adapter, []).append(waiter)
+                try:
+                    await asyncio.wait((waiter,), timeout=SLOT_RECHECK_INTERVAL)
+                finally:
+                    self._waiters[adapter].remove(waiter)
+        finally:
+            usage.waiting -= 1
+        granted = time.monotonic()
+        usage.max_wait = max(usage.max_wait, granted - queued_at)
+        usage.active += 1
+        if granted - queued_at > 1.0:
+            LOGGER.debug(
+                "(%s) Waited %.3f s for a slot on %s",
+                address,
+                granted - queued_at,
+                adapter,
+            )
+        lease = _Lease(adapter, heater, granted_at=granted)
+        lease.remove_listener = heater.add_disconnect_listener(
+            lambda: self._release(address, lease)
+        )
+        self._leases[address] = lease
+        return lease
+
+    def _held(self, adapter: str) -> int:
+        # Heaters that dropped off without telling us don't count. One that's still connecting does.
+        for address, lease in list(self._leases.items()):
+            if lease.in_use == 0 and not lease.heater.is_connected:
+                self._release(address, lease)
+        return sum(1 for lease in self._leases.values() if lease.adapter == adapter)
+
+    def _idle_lease(self, adapter: str) -> _Lease | None:
+        idle = [
+            lease
+            for address, lease in self._leases.items()
+            if lease.adapter == adapter
+            and lease.in_use == 0
+            and not lease.reclaiming
+            and address in self._releasers
+        ]
+        return min(idle, key=lambda lease: lease.idle_since, default=None)
+
+    async def _async_reclaim(self, lease: _Lease, wanted_by: str) -> None:
+        address = lease.heater.device.address
+        LOGGER.debug(
+            "(%s) Asking for the slot on %s back for %s after %.1f s idle",
+            address,
+            lease.adapter,
+            wanted_by,
+            time.monotonic() - lease.idle_since,
+        )
+        released = False
+        try:
+            if (release := self._releasers.get(address)) is not None:
+                released = await release()
+        finally:
+            lease.reclaiming = False
+        if released:
+            self._usage[lease.adapter].handovers += 1
+        else:
+            # Busy after all. Try someone else before coming back to it.
+            lease.idle_since = time.monotonic()
+
+    @callback
+    def _release(self, address: str, lease: _Lease | None = None) -> None:
+        """Give up address's slot, or only lease if it's still the one address holds."""
+        if (held := self._leases.get(address)) is None or lease not in (None, held):
+            return
+        lease = self._leases.pop(address)
+        if lease.remove_listener is not None:
+            lease.remove_listener()
+        usage = self._usage[lease.adapter]
+        usage.active -= 1
+        usage.busy_seconds += time.monotonic() - lease.granted_at
+        self._wake(lease.adapter)
+
+    def _usage_for(self, adapter: str) -> AdapterUsage:
+        if adapter not in self._usage:
+            self._usage[adapter] = AdapterUsage(slots=ADAPTER_CONNECTION_SLOTS)
+        return self._usage[adapter]
+
+    def _wake(self, adapter: str) -> None:
+        """Let everyone waiting on adapter know a slot might have come free."""
+        for waiter in self._waiters.get(adapter, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @callback
+    def async_usage(self) -> dict[str, dict[str, Any]]:
+        return {adapter: usage.as_dict() for adapter, usage in self._usage.items()}
+
+
+@callback
+def async_get_arbiter(hass: HomeAssistant) -> SlotArbiter:
+    if ARBITER_KEY not in hass.data:
+        hass.data[ARBITER_KEY] = SlotArbiter(hass)
+    return hass.data[ARBITER_KEY]
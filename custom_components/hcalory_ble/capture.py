@@ -0,0 +1,86 @@
+"""
+Raw frame capture, so whatever a heater did in the field can be played back later without the heater.
+
+A capture file is MAGIC followed by one record per frame: a RECORD header (time.time(), direction, payload length)
+and then the payload, exactly as it went over the air. Files are only ever appended to, so a capture that got cut
+off halfway through a record is still good up to that record.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import enum
+import struct
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+MAGIC = b"HCALCAP1"
+RECORD = struct.Struct("<dBH")
+
+
+class Direction(enum.IntEnum):
+    SENT = 0
+    RECEIVED = 1
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class CapturedFrame:
+    at: float
+    direction: Direction
+    payload: bytes
+
+
+class FrameRecorder:
+    """
+    Collects frames in memory and appends them to path whenever async_flush is called.
+
+    record() is cheap and safe to call from the event loop. The file is only touched from the executor.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.frames: int = 0
+        self._pending = bytearray()
+        self._flush_lock = asyncio.Lock()
+
+    def record(
+        self, direction: Direction, payload: bytes, at: float | None = None
+    ) -> None:
+        self._pending += RECORD.pack(
+            time.time() if at is None else at, direction, len(payload)
+        )
+        self._pending += payload
+        self.frames += 1
+
+    async def async_flush(self) -> None:
+        # One flush at a time, or two executor jobs could append their chunks out of order.
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            chunk = bytes(self._pending)
+            self._pending.clear()
+            await asyncio.get_running_loop().run_in_executor(None, self._write, chunk)
+
+    def _write(self, chunk: bytes) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("ab") as capture:
+            if capture.tell() == 0:
+                capture.write(MAGIC)
+            capture.write(chunk)
+
+
+def read_capture(path: Path) -> Iterator[CapturedFrame]:
+    """Every frame in a capture file, oldest first. Blocks on file I/O, so keep it off the event loop."""
+    data = path.read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} isn't a Hcalory BLE capture")
+    offset = len(MAGIC)
+    while offset + RECORD.size <= len(data):
+        at, direction, length = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + length > len(data):
+            break
+        yield CapturedFrame(at, Direction(direction), data[offset : offset + length])
+        offset += length
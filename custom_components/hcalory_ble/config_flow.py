@@ -4,7 +4,6 @@ from __future__ import annotations
 
 from typing import Any
 
-import hcalory_control.heater
 import voluptuous as vol
 from bleak import BleakError
 from homeassistant.components import bluetooth
@@ -13,6 +12,7 @@ from homeassistant.const import (
     CONF_ADDRESS,
 )
 
+from .connection import async_get_connections
 from .const import DEVICE_SERVICE_UUIDS, DOMAIN, LOGGER, MANUFACTURER_BLE_ID
 
 
@@ -70,12 +70,19 @@ class HcaloryBLEConfigFlow(ConfigFlow, domain=DOMAIN):
             self._name = device.name
 
         assert self._name
+        connections = async_get_connections(self.hass)
+        heater = connections.async_get(device)
         try:
-            heater = hcalory_control.heater.HCaloryHeater(device)
-            await heater.get_data()
+            # The confirm step runs twice (once to show the form, once on submit). No need to talk to the heater
+            # again the second time around.
+            if not heater.is_connected or heater.heater_response is None:
+                await heater.get_data()
         except (BleakError, TimeoutError, ValueError) as e:
             LOGGER.exception("Failed to connect to device: %s", e, exc_info=e)
+            await connections.async_release(self.address)
             return self.async_abort(reason="cannot_connect")
+        # Keep the connection around for async_setup_entry to pick up.
+        connections.async_park(heater)
 
         title = f"{self._name} {self.address}"
 
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import bleak
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN, LOGGER
+from .heater import HcaloryHeater
+
+CONNECTIONS_KEY = f"{DOMAIN}_connections"
+# A heater the config flow connected to, but that nobody has claimed yet, gets disconnected after this long.
+# That covers people who wander off from the confirmation dialog without leaving the slot tied up forever.
+UNCLAIMED_TIMEOUT = 300.0  # seconds
+
+
+class HeaterConnections:
+    """
+    One HcaloryHeater per address, handed from the config flow to the config entry to the coordinator.
+
+    Setting up a heater used to connect three times in a row: once to confirm it in the config flow, once in
+    async_setup_entry and once more for the first refresh. ESPHome proxies only have a handful of connection
+    slots, so now the flow parks its connected heater here and setup picks it back up, along with the frame
+    it already read.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._heaters: dict[str, HcaloryHeater] = {}
+        self._expirations: dict[str, CALLBACK_TYPE] = {}
+
+    @callback
+    def async_get(self, device: bleak.BLEDevice) -> HcaloryHeater:
+        heater = self._heaters.get(device.address)
+        if heater is None:
+            heater = self._heaters[device.address] = HcaloryHeater(device)
+        else:
+            LOGGER.debug("(%s) Reusing existing heater connection", device.address)
+            # The heater may have found its way to us through a different adapter or proxy since last time.
+            if not heater.is_connected:
+                heater.device = device
+        return heater
+
+    @callback
+    def async_park(self, heater: HcaloryHeater) -> None:
+        address = heater.device.address
+        self._cancel_expiration(address)
+        self._expirations[address] = async_call_later(
+            self.hass, UNCLAIMED_TIMEOUT, lambda _: self._async_expire(address)
+        )
+
+    @callback
+    def async_claim(self, device: bleak.BLEDevice) -> HcaloryHeater:
+        self._cancel_expiration(device.address)
+        return self.async_get(device)
+
+    async def async_release(self, address: str) -> None:
+        self._cancel_expiration(address)
+        heater = self._heaters.pop(address, None)
+        if heater is not None and heater.is_connected:
+            await heater.disconnect()
+
+    @callback
+    def _async_expire(self, address: str) -> None:
+        self._expirations.pop(address, None)
+        LOGGER.debug("(%s) Nobody claimed this heater, disconnecting", address)
+        self.hass.async_create_task(self.async_release(address))
+
+    def _cancel_expiration(self, address: str) -> None:
+        if (cancel := self._expirations.pop(address, None)) is not None:
+            cancel()
+
+
+@callback
+def async_get_connections(hass: HomeAssistant) -> HeaterConnections:
+    if CONNECTIONS_KEY not in hass.data:
+        hass.data[CONNECTIONS_KEY] = HeaterConnections(hass)
+    return hass.data[CONNECTIONS_KEY]
@@ -15,6 +15,8 @@ DOMAIN: str = "hcalory_ble"
 MANUFACTURER = "HCalory"
 
 GET_DEVICE_TIMEOUT = 5  # seconds
+# ESPHome Bluetooth proxies hand out 3 active connections by default, and that's the bottleneck more often than not.
+ADAPTER_CONNECTION_SLOTS = 3
 MANUFACTURER_BLE_ID: int = 45548
 
 DEVICE_SERVICE_UUIDS: set[str] = {"0000fff0-0000-1000-8000-00805f9b34fb"}
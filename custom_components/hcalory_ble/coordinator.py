@@ -1,47 +1,824 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
 import json
+import logging
+import random
+import time
+from collections.abc import Callable
 from datetime import timedelta
+from pathlib import Path
+from typing import Any
 
-import aioesphomeapi.core
 import hcalory_control.heater
 from bleak import BleakError
 from bleak_retry_connector import close_stale_connections_by_address
 from homeassistant.components import bluetooth
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .advertisement import AdvertisedState, decode_advertisement
+from .apply import ApplyResult, DesiredState, async_apply_state
+from .arbiter import async_get_arbiter
+from .capture import FrameRecorder
 from .const import DOMAIN, LOGGER
+from .errors import connection_errors, read_errors
+from .heater import HcaloryHeater
+from .paths import PathHistory, async_connected_source
+from .pipeline import HeaterPipeline
+from .snapshot import HeaterSnapshotStore
+from .telemetry import TelemetryBuffer
+from .values import HeaterValues
 
-# The Hcalory app scans every 100 milliseconds. That's excessive, but 5 seconds seems reasonable enough.
-SCAN_INTERVAL = timedelta(seconds=5)
+# The Hcalory app scans every 100 milliseconds. That's excessive. Any frame the heater sends over notifications
+# gets published straight away, but as far as anyone has seen it only sends them when asked, so we still have to ask.
+POLL_INTERVAL = timedelta(seconds=5)
+# Ignition, cooldown and errors are when things change quickly (and when people are staring at the dashboard),
+# so we keep a much closer eye on the heater then.
+TRANSITION_INTERVAL = timedelta(seconds=2)
+# An off heater isn't going anywhere until someone tells it to, and that someone is usually us. Someone pressing
+# the button on the heater still shows up within this long.
+IDLE_INTERVAL = timedelta(seconds=30)
+# How recently the heater has to have advertised for its advertisements to count as keeping an eye on it.
+ADVERTISEMENT_MAX_AGE = timedelta(minutes=2)
+# After this many failed updates in a row we start doubling the interval, up to MAX_BACKOFF_INTERVAL.
+FAILURES_BEFORE_BACKOFF = 3
+MAX_BACKOFF_INTERVAL = timedelta(minutes=10)
+# After this many failed updates in a row, the heater is probably out of range or switched off at the battery.
+# We stop polling altogether and wait for it to advertise again instead.
+DORMANT_AFTER_FAILURES = 5
+# A heater a passive scanner can hear but nothing can connect to would otherwise wake us on every advertisement.
+DORMANT_WAKE_COOLDOWN = timedelta(minutes=1)
+# An off heater we aren't connected to is watched through its advertisements instead of being polled. We still
+# connect for a real frame at least this often, in case its advertisements don't change when it gets turned on.
+PASSIVE_MAX_AGE = timedelta(minutes=15)
+# A running heater gets read this often just for the telemetry buffer. Glow plug ignition drags the voltage down
+# for a few seconds at a time, which the watchdog would sail straight past.
+TELEMETRY_SAMPLE_INTERVAL = timedelta(seconds=1)
+# How often the telemetry min/max/mean sensors get a new value. Every sample would bury the recorder.
+TELEMETRY_PUBLISH_INTERVAL = timedelta(minutes=1)
+# While capturing raw frames, this is how much of a capture we stand to lose if Home Assistant falls over.
+CAPTURE_FLUSH_INTERVAL = timedelta(seconds=10)
+# An off heater we're still connected to gets let go of once it's sat idle for this many times what connecting to
+# it actually costs, so the slots on the proxy are free for everything else. The slower a heater is to connect to,
+# the longer it's worth hanging on to in case somebody wants it again soon. Clamped between the two below.
+CONNECTION_HOLD_FACTOR = 20
+MIN_CONNECTION_HOLD = timedelta(seconds=30)
+MAX_CONNECTION_HOLD = timedelta(minutes=10)
+# What we figure a connect costs until we've timed one.
+DEFAULT_CONNECT_COST = 5.0  # seconds
+# How often we check whether the connection is still worth holding on to.
+IDLE_CHECK_INTERVAL = timedelta(seconds=15)
+# A failed reconnect holds off the next one for RECONNECT_BACKOFF, doubling with every failure in a row up to
+# RECONNECT_BACKOFF_MAX. Each wait is randomly shortened by up to half so a handful of heaters that dropped
+# off together don't all come knocking at the same moment again.
+RECONNECT_BACKOFF = 2.0  # seconds
+RECONNECT_BACKOFF_MAX = 60.0  # seconds
+# After this many failed reconnects in a row, stop trying altogether for RECONNECT_BREAKER_COOLDOWN.
+RECONNECT_BREAKER_THRESHOLD = 5
+RECONNECT_BREAKER_COOLDOWN = 300.0  # seconds
+# How long the heater gets to back up a command we've already shown as done before we take it back.
+OPTIMISTIC_TIMEOUT = 10.0  # seconds
+# While somebody is waiting on the heater to get into some state, read it this often. The heater usually only
+# tells us things when asked.
+WAIT_POLL_INTERVAL = 0.5  # seconds
+# Every value an entity shows. Anything that isn't in here can't make an entity write its state.
+PUBLISHED_FIELDS: tuple[str, ...] = (
+    "heater_state",
+    "heater_mode",
+    "heater_setting",
+    "running",
+    "voltage",
+    "body_temperature",
+    "ambient_temperature",
+)
+# How far a reading can move from the last value we published without being published straight away. hcalory_control
+# hands these over in whole volts and degrees, chopping off the tenths, so a reading sitting right on the line flips
+# back and forth by one (voltage especially), which otherwise means a recorder row on every frame. The telemetry
+# sensors still catch every sample.
+DEADBANDS: dict[str, int] = {
+    "voltage": 1,
+    "body_temperature": 2,
+    "ambient_temperature": 1,
+}
+# A move inside the deadband still gets published once the reading has stayed put on the new value for this many
+# updates in a row. Jitter never does, and a battery that really has dropped a volt doesn't get hidden forever.
+DEADBAND_HOLD_UPDATES = 3
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Expectation:
+    """A command we've told everyone already happened, and how to tell when the heater agrees."""
+
+    reason: str
+    # HeaterResponse fields to show in place of what the heater reports until it agrees.
+    changes: dict[str, Any]
+    confirm: Callable[[hcalory_control.heater.HeaterResponse], bool]
+
+
+def scheduled_interval(data: hcalory_control.heater.HeaterResponse) -> timedelta:
+    if (
+        data.preheating
+        or data.cooldown
+        or data.heater_state == hcalory_control.heater.HeaterState.error
+        or data.heater_mode == hcalory_control.heater.HeaterMode.ignition_failed
+    ):
+        return TRANSITION_INTERVAL
+    if data.heater_state == hcalory_control.heater.HeaterState.off:
+        return IDLE_INTERVAL
+    return POLL_INTERVAL
+
+
+def backoff_interval(failures: int) -> timedelta:
+    if failures < FAILURES_BEFORE_BACKOFF:
+        return POLL_INTERVAL
+    return min(
+        POLL_INTERVAL * 2 ** (failures - FAILURES_BEFORE_BACKOFF + 1),
+        MAX_BACKOFF_INTERVAL,
+    )
 
 
 class HcaloryCoordinator(DataUpdateCoordinator[hcalory_control.heater.HeaterResponse]):
     def __init__(
         self,
         hass: HomeAssistant,
-        heater: hcalory_control.heater.HCaloryHeater,
+        heater: HcaloryHeater,
         address: str,
         name: str,
+        snapshots: HeaterSnapshotStore | None = None,
     ) -> None:
         super().__init__(
-            hass=hass, logger=LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL
+            hass=hass, logger=LOGGER, name=DOMAIN, update_interval=POLL_INTERVAL
+        )
+        self.heater: HcaloryHeater = heater
+        self.arbiter = async_get_arbiter(hass)
+        # How reads through each adapter or proxy we've been connected through have gone, and which one Home
+        # Assistant connected us through last, if it would tell us. Looked up again after every reconnect.
+        self.paths = PathHistory()
+        self.path: str | None = None
+        self._path_stale: bool = True
+        # Platforms go through this instead of talking to the heater directly.
+        self.pipeline: HeaterPipeline = HeaterPipeline(
+            heater, self.arbiter, on_read=self._async_record_read
         )
-        self.heater: hcalory_control.heater.HCaloryHeater = heater
         self.address: str = address
+        # How much later than usual our first scheduled poll goes out, so heaters sharing a proxy don't poll in
+        # lockstep. None once it's been used. Every poll after that is a whole interval after the one before.
+        self._stagger: timedelta | None = self.arbiter.async_register(
+            address, self._async_give_up_slot
+        )
         self.name: str = name
+        self._polling: bool = False
+        self.consecutive_failures: int = 0
+        # True while we're not polling and waiting for an advertisement to tell us the heater is back.
+        self.dormant: bool = False
+        # time.monotonic() of the last time an advertisement woke us up.
+        self._last_wake: float = 0.0
+        self.snapshots: HeaterSnapshotStore | None = snapshots
+        # True while data is the snapshot we started up with rather than anything the heater told us.
+        self.restored: bool = False
+        # What entities were last told, and which of it changed this time around. None means everything.
+        self._published: dict[str, Any] = {}
+        self._published_state: tuple[bool, bool] | None = None
+        # Readings that moved inside their deadband, and how many updates in a row they've stayed there.
+        self._held: dict[str, tuple[int, int]] = {}
+        self._changed_fields: frozenset[str] | None = None
+        # What entities read instead of data, and the frame it was built from.
+        self.values: HeaterValues | None = None
+        self._values_source: hcalory_control.heater.HeaterResponse | None = None
+        self._remove_frame_listener = heater.add_frame_listener(
+            self._async_handle_frame
+        )
+        self._remove_disconnect_listener = heater.add_disconnect_listener(
+            self._async_handle_disconnect
+        )
+        # time.monotonic() of the last frame we actually got from the heater.
+        self._last_frame_at: float = 0.0
+        self.advertised: AdvertisedState | None = None
+        self._advertisement_changed: bool = False
+        # The reconnect everybody is waiting on, if there is one, and when we're allowed to start the next one.
+        self._reconnect: asyncio.Task[None] | None = None
+        self.reconnect_failures: int = 0
+        self._reconnect_not_before: float = 0.0
+        # The command we're showing ahead of the heater, if any, and the last frame the heater actually sent.
+        self._expectation: Expectation | None = None
+        self._confirmed: hcalory_control.heater.HeaterResponse | None = None
+        self._confirm_task: asyncio.Task[None] | None = None
+        # Everyone in async_wait_for, and what they're waiting to see.
+        self._waiters: list[
+            tuple[
+                Callable[[hcalory_control.heater.HeaterResponse], bool],
+                asyncio.Future[hcalory_control.heater.HeaterResponse],
+            ]
+        ] = []
+        self.telemetry = TelemetryBuffer()
+        # What the telemetry sensors show: min, max and mean over the last TELEMETRY_PUBLISH_INTERVAL with samples.
+        self.telemetry_summary: dict[str, float] = {}
+        self._telemetry_published_at: float = time.time()
+        self._sampling: asyncio.Task[None] | None = None
+        self._cancel_capture_flush: Callable[[], None] | None = None
+        # time.monotonic() of the last time the heater was doing anything, or we asked it to.
+        self._active_at: float = time.monotonic()
+        # True while we're disconnected on purpose because the heater had nothing going on.
+        self.released: bool = False
+        self.idle_releases: int = 0
+        self._releasing: asyncio.Task[None] | None = None
+        self._cancel_idle_check = async_track_time_interval(
+            hass, self._async_check_idle, IDLE_CHECK_INTERVAL
+        )
+        self._cancel_telemetry_timers = (
+            async_track_time_interval(
+                hass, self._async_sample_telemetry, TELEMETRY_SAMPLE_INTERVAL
+            ),
+            async_track_time_interval(
+                hass, self._async_publish_telemetry, TELEMETRY_PUBLISH_INTERVAL
+            ),
+        )
+        self._remove_advertisement_callback = bluetooth.async_register_callback(
+            hass,
+            self._async_handle_advertisement,
+            bluetooth.BluetoothCallbackMatcher(address=address, connectable=False),
+            bluetooth.BluetoothScanningMode.PASSIVE,
+        )
+
+    @callback
+    def _async_handle_frame(self, data: hcalory_control.heater.HeaterResponse) -> None:
+        # While our own poll's read has the heater, this is the frame the poll is about to return through
+        # _async_update_data. No sense publishing it twice.
+        if self._polling and self.pipeline.reading:
+            return
+        LOGGER.debug("(%s) Pushed frame: %s", self.address, data)
+        self._last_frame_at = time.monotonic()
+        self._advertisement_changed = False
+        self.restored = False
+        self.consecutive_failures = 0
+        self.dormant = False
+        self.released = False
+        data = self._reconcile(data)
+        self.update_interval = self._next_interval(data)
+        # This also pushes the next poll back out by another update_interval.
+        self.async_set_updated_data(data)
+
+    @callback
+    def _async_handle_advertisement(
+        self,
+        service_info: bluetooth.BluetoothServiceInfoBleak,
+        change: bluetooth.BluetoothChange,
+    ) -> None:
+        advertised = decode_advertisement(service_info)
+        previous, self.advertised = self.advertised, advertised
+        if self.dormant:
+            self._async_wake()
+            return
+        if previous is None or previous.payload == advertised.payload:
+            return
+        LOGGER.debug(
+            "(%s) Advertisement changed from %s to %s, refreshing",
+            self.address,
+            previous.payload.hex() if previous.payload is not None else None,
+            advertised.payload.hex() if advertised.payload is not None else None,
+        )
+        self._advertisement_changed = True
+        self.hass.async_create_task(self.async_request_refresh())
+
+    @callback
+    def _async_go_dormant(self) -> None:
+        if self.dormant:
+            return
+        LOGGER.info(
+            "(%s) %d failed updates in a row. Not trying again until the heater advertises.",
+            self.address,
+            self.consecutive_failures,
+        )
+        self.dormant = True
+        # No interval, no polls. The advertisement callback is all that's left running.
+        self.update_interval = None
+
+    @callback
+    def _async_wake(self) -> None:
+        now = time.monotonic()
+        if now - self._last_wake < DORMANT_WAKE_COOLDOWN.total_seconds():
+            return
+        self._last_wake = now
+        LOGGER.info("(%s) Heater is advertising again, reconnecting", self.address)
+        self.dormant = False
+        # The heater just told us it's there, so whatever the reconnect backoff thinks doesn't matter anymore.
+        self._reconnect_not_before = 0.0
+        self.reconnect_failures = 0
+        self.update_interval = backoff_interval(self.consecutive_failures)
+        self.hass.async_create_task(self.async_refresh())
+
+    def _advertising(self) -> bool:
+        """Whether we've heard the heater advertise recently enough for its advertisements to keep an eye on it."""
+        return (
+            self.advertised is not None
+            and time.monotonic() - self.advertised.seen_at
+            < ADVERTISEMENT_MAX_AGE.total_seconds()
+        )
+
+    def _can_stay_passive(self) -> bool:
+        """
+        Whether this update can be skipped because the heater's advertisements are keeping an eye on it.
+
+        Only an off heater we aren't connected to qualifies. Anything else is either doing something interesting
+        or already has a connection, at which point a read is cheap.
+        """
+        return (
+            self.data is not None
+            and not self.restored
+            and self._expectation is None
+            and not self._advertisement_changed
+            and not self.heater.is_connected
+            and self.data.heater_state == hcalory_control.heater.HeaterState.off
+            and self._advertising()
+            and time.monotonic() - self._last_frame_at < PASSIVE_MAX_AGE.total_seconds()
+        )
+
+    def connection_hold(self) -> float:
+        """How long, in seconds, an idle connection is worth keeping, going by what reconnecting really costs."""
+        cost = self.heater.stats.percentile("connect", 50)
+        if cost is None:
+            cost = DEFAULT_CONNECT_COST
+        return min(
+            max(cost * CONNECTION_HOLD_FACTOR, MIN_CONNECTION_HOLD.total_seconds()),
+            MAX_CONNECTION_HOLD.total_seconds(),
+        )
+
+    def _is_idle(self) -> bool:
+        """
+        Whether nothing needs the connection right now: the heater is off and we aren't waiting on it for anything.
+
+        Only counts while the heater is advertising. Otherwise the next watchdog poll would just connect straight
+        back, and connecting is the expensive part.
+        """
+        return (
+            self.data is not None
+            and not self.restored
+            and self.data.heater_state == hcalory_control.heater.HeaterState.off
+            and self._expectation is None
+            and not self._waiters
+            and self._reconnect is None
+            and self._sampling is None
+            and self._advertising()
+        )
+
+    @callback
+    def _async_check_idle(self, _now: Any) -> None:
+        if (
+            not self.heater.is_connected
+            or self._releasing is not None
+            or self.pipeline.queue_depth
+            or not self._is_idle()
+            or time.monotonic() - self._active_at < self.connection_hold()
+        ):
+            return
+        self._releasing = self.hass.async_create_background_task(
+            self._async_release(), f"{DOMAIN} {self.address} release connection"
+        )
+
+    async def _async_release(self) -> None:
+        try:
+            # Through the pipeline, so the connection never gets pulled out from under a command. If anything else
+            # got queued while we waited for our turn, it wants the connection and we leave it be.
+            async with self.pipeline.session("release connection") as heater:
+                if (
+                    not heater.is_connected
+                    or self.pipeline.queue_depth > 1
+                    or not self._is_idle()
+                ):
+                    return
+                LOGGER.debug(
+                    "(%s) Idle for %.0f s, disconnecting to free up the slot (connecting takes about %.1f s)",
+                    self.address,
+                    time.monotonic() - self._active_at,
+                    self.heater.stats.percentile("connect", 50) or DEFAULT_CONNECT_COST,
+                )
+                await heater.disconnect()
+                self.released = True
+                self.idle_releases += 1
+        except connection_errors() as e:
+            LOGGER.debug("(%s) Disconnecting idle heater failed: %s", self.address, e)
+        finally:
+            self._releasing = None
+
+    async def _async_give_up_slot(self) -> bool:
+        """Disconnect so a heater waiting on our adapter can have the slot, unless something still wants us."""
+        try:
+            async with self.pipeline.session("give up slot") as heater:
+                if (
+                    not heater.is_connected
+                    or self.pipeline.queue_depth > 1
+                    or self._expectation is not None
+                    or self._waiters
+                ):
+                    return False
+                LOGGER.debug(
+                    "(%s) Disconnecting so another heater can have the slot",
+                    self.address,
+                )
+                await heater.disconnect()
+                self.released = True
+                return True
+        except connection_errors() as e:
+            LOGGER.debug("(%s) Giving up the slot failed: %s", self.address, e)
+            return False
+
+    @callback
+    def _async_handle_disconnect(self) -> None:
+        # Whatever we reconnect through is Home Assistant's call, so we have to go and look again. self.path stays
+        # put until then, so a read that failed because of the disconnect still counts against the right path.
+        self._path_stale = True
+        self.arbiter.async_set_path(self.address, None)
+
+    @callback
+    def _async_record_read(self, latency: float | None) -> None:
+        if self._path_stale and self.heater.is_connected:
+            self._path_stale = False
+            self.path = async_connected_source(self.hass, self.address)
+            self.arbiter.async_set_path(self.address, self.path)
+            LOGGER.debug("(%s) Connected through %s", self.address, self.path)
+        if self.path is not None:
+            self.paths.record(self.path, latency)
+
+    @callback
+    def async_restore(self, data: hcalory_control.heater.HeaterResponse) -> None:
+        LOGGER.debug("(%s) Starting up with restored frame: %s", self.address, data)
+        self.restored = True
+        self.async_set_updated_data(data)
+
+    def _next_interval(self, data: hcalory_control.heater.HeaterResponse) -> timedelta:
+        # Until the heater backs up a command we've already shown, keep checking in on it like it's mid-transition.
+        if self._expectation is not None:
+            return TRANSITION_INTERVAL
+        return scheduled_interval(data)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        if self._stagger is None or self.update_interval is None:
+            super()._schedule_refresh()
+            return
+        stagger, self._stagger = self._stagger, None
+        interval = self.update_interval
+        self.update_interval = interval + stagger
+        try:
+            super()._schedule_refresh()
+        finally:
+            self.update_interval = interval
+
+    @callback
+    def async_set_optimistic(
+        self,
+        reason: str,
+        confirm: Callable[[hcalory_control.heater.HeaterResponse], bool],
+        timeout: float = OPTIMISTIC_TIMEOUT,
+        **changes: Any,
+    ) -> None:
+        """
+        Show the result of a command right away instead of waiting for the heater to get around to it.
+
+        changes are shown on top of every frame until one passes confirm, which we go looking for with
+        async_wait_for. If none does within timeout, or async_rollback is called, we go back to whatever the heater
+        last reported. A newer expectation replaces the one before it.
+        """
+        if self.data is None:
+            return
+        if self._confirmed is None:
+            self._confirmed = self.data
+        self._clear_expectation()
+        self._active_at = time.monotonic()
+        self._expectation = expectation = Expectation(reason, changes, confirm)
+        self._confirm_task = self.hass.async_create_background_task(
+            self._async_confirm(expectation, timeout),
+            f"{DOMAIN} {self.address} confirm {reason}",
+        )
+        LOGGER.debug(
+            "(%s) Optimistically showing %s: %s", self.address, reason, changes
+        )
+        data = dataclasses.replace(self.data, **changes)
+        self.update_interval = self._next_interval(data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def async_rollback(self) -> None:
+        """Stop showing a command ahead of the heater and go back to the last thing it actually told us."""
+        if self._expectation is None:
+            return
+        self._clear_expectation()
+        if self._confirmed is not None:
+            self.update_interval = self._next_interval(self._confirmed)
+            self.async_set_updated_data(self._confirmed)
+
+    def _clear_expectation(self) -> None:
+        self._expectation = None
+        task, self._confirm_task = self._confirm_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    async def _async_confirm(self, expectation: Expectation, timeout: float) -> None:
+        errors: tuple[type[Exception], ...] = (*read_errors(), UpdateFailed)
+        try:
+            await self.async_wait_for(expectation.confirm, timeout)
+        except errors as e:
+            if self._expectation is not expectation:
+                return
+            LOGGER.warning(
+                "(%s) Heater never confirmed %s (%s). Expected %s, heater says %s. Rolling back.",
+                self.address,
+                expectation.reason,
+                type(e).__name__,
+                expectation.changes,
+                {
+                    field: getattr(self._confirmed, field, None)
+                    for field in expectation.changes
+                },
+            )
+            self.async_rollback()
+            return
+        # Normally the frame that confirmed it already cleared it, unless the heater was there before we even asked.
+        if self._expectation is expectation:
+            self._clear_expectation()
+            if self._confirmed is not None:
+                self.update_interval = self._next_interval(self._confirmed)
+                self.async_set_updated_data(self._confirmed)
+
+    async def async_wait_for(
+        self,
+        predicate: Callable[[hcalory_control.heater.HeaterResponse], bool],
+        timeout: float,
+    ) -> hcalory_control.heater.HeaterResponse:
+        """
+        Wait until the heater sends a frame that satisfies predicate, and return that frame.
+
+        Returns straight away if the last frame already does. Otherwise this keeps asking the heater every
+        WAIT_POLL_INTERVAL and also takes any frame that shows up in the meantime, pushed or read by someone else.
+        Raises TimeoutError if nothing matches within timeout. Don't call this from inside a pipeline session,
+        it'd wait on itself.
+        """
+        if self._confirmed is not None and predicate(self._confirmed):
+            return self._confirmed
+        future: asyncio.Future[hcalory_control.heater.HeaterResponse] = (
+            self.hass.loop.create_future()
+        )
+        waiter = (predicate, future)
+        self._waiters.append(waiter)
+        read: asyncio.Task[hcalory_control.heater.HeaterResponse] | None = None
+        try:
+            async with asyncio.timeout(timeout):
+                while not future.done():
+                    read = asyncio.create_task(self.pipeline.get_data())
+                    await asyncio.wait(
+                        (future, read), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not read.done():
+                        break
+                    read.result()
+                    await asyncio.wait((future,), timeout=WAIT_POLL_INTERVAL)
+            return future.result()
+        finally:
+            self._waiters.remove(waiter)
+            if read is not None and not read.done():
+                read.cancel()
+
+    def _reconcile(
+        self, data: hcalory_control.heater.HeaterResponse
+    ) -> hcalory_control.heater.HeaterResponse:
+        """What to publish for a frame the heater sent, given any command we're showing ahead of it."""
+        self._confirmed = data
+        if data.heater_state != hcalory_control.heater.HeaterState.off:
+            self._active_at = time.monotonic()
+        self.telemetry.record(data)
+        for predicate, future in self._waiters:
+            if not future.done() and predicate(data):
+                future.set_result(data)
+        if (expectation := self._expectation) is None:
+            return data
+        if expectation.confirm(data):
+            LOGGER.debug("(%s) Heater confirmed %s", self.address, expectation.reason)
+            self._clear_expectation()
+            return data
+        # The heater usually takes a moment to catch up. Meanwhile everything else it reports is still news.
+        return dataclasses.replace(data, **expectation.changes)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        if self.data is not self._values_source:
+            self._values_source = self.data
+            self.values = (
+                HeaterValues.from_response(self.data) if self.data is not None else None
+            )
+        self._changed_fields = self._diff()
+        # Only ever save what the heater told us, never what we're expecting it to say.
+        if (
+            self.snapshots is not None
+            and self.data is not None
+            and not self.restored
+            and self._expectation is None
+        ):
+            self.snapshots.async_save(self.name, self.data)
+        super().async_update_listeners()
+
+    def has_changed(self, field: str) -> bool:
+        """Whether field moved enough in the latest update for an entity showing it to write its state."""
+        return self._changed_fields is None or field in self._changed_fields
+
+    def _diff(self) -> frozenset[str] | None:
+        # Going (un)available or swapping restored data for live data changes every entity, whatever the values do.
+        state = (self.last_update_success, self.restored)
+        if state != self._published_state or self.values is None:
+            self._published_state = state
+            self._published = {}
+            self._held = {}
+        changed = set()
+        for field in PUBLISHED_FIELDS if self.values is not None else ():
+            value = getattr(self.values, field)
+            if field in self._published:
+                published = self._published[field]
+                if value == published:
+                    self._held.pop(field, None)
+                    continue
+                if field in DEADBANDS and abs(value - published) <= DEADBANDS[field]:
+                    held_value, updates = self._held.get(field, (value, 0))
+                    updates = updates + 1 if held_value == value else 1
+                    if updates < DEADBAND_HOLD_UPDATES:
+                        self._held[field] = (value, updates)
+                        continue
+            self._held.pop(field, None)
+            self._published[field] = value
+            changed.add(field)
+        for field, value in self.telemetry_summary.items():
+            if self._published.get(field) != value:
+                self._published[field] = value
+                changed.add(field)
+        if not self._published:
+            return None
+        return frozenset(changed)
+
+    @callback
+    def _async_sample_telemetry(self, _now: Any) -> None:
+        # Only a running heater does anything worth sampling this closely, and reconnecting is the watchdog's job.
+        if (
+            self._sampling is not None
+            or self.data is None
+            or not self.data.running
+            or not self.heater.is_connected
+        ):
+            return
+        self._sampling = self.hass.async_create_background_task(
+            self._async_read_sample(), f"{DOMAIN} {self.address} telemetry"
+        )
+
+    async def _async_read_sample(self) -> None:
+        try:
+            # The frame comes back through _async_handle_frame, which records it like any other.
+            await self.pipeline.get_data()
+        except read_errors() as e:
+            LOGGER.debug("(%s) Telemetry read failed: %s", self.address, e)
+        finally:
+            self._sampling = None
+
+    @callback
+    def _async_publish_telemetry(self, _now: Any) -> None:
+        since, self._telemetry_published_at = self._telemetry_published_at, time.time()
+        summary = self.telemetry.summarize(since)
+        if not summary or summary == self.telemetry_summary:
+            return
+        self.telemetry_summary = summary
+        self.async_update_listeners()
+
+    async def async_apply_state(self, desired: DesiredState) -> ApplyResult:
+        """Get the heater to desired in one go, without anyone else getting a word in edgewise."""
+        self._active_at = time.monotonic()
+        async with self.pipeline.session("apply state") as heater:
+            result = await async_apply_state(heater, desired)
+        LOGGER.debug(
+            "(%s) Applied %s: %d commands in %.2f s, verified: %s",
+            self.address,
+            desired,
+            result.commands_sent,
+            result.duration,
+            result.verified,
+        )
+        if not result.verified:
+            # Almost always the heater taking its time to start or stop. Show it as done and let it catch up.
+            self.async_set_optimistic(
+                "apply state", desired.satisfied_by, **desired.changes(result.data)
+            )
+        return result
+
+    @callback
+    def async_start_capture(self, path: Path) -> None:
+        """Start appending every raw frame sent to or received from the heater to path."""
+        if self.heater.recorder is not None:
+            raise ValueError(
+                f"Already capturing {self.address} to {self.heater.recorder.path}"
+            )
+        LOGGER.info("(%s) Capturing raw frames to %s", self.address, path)
+        self.heater.recorder = FrameRecorder(path)
+        self._cancel_capture_flush = async_track_time_interval(
+            self.hass, self._async_flush_capture, CAPTURE_FLUSH_INTERVAL
+        )
+
+    async def async_stop_capture(self) -> Path | None:
+        """Stop capturing and write out whatever's left. Returns where the capture went, if there was one."""
+        if (recorder := self.heater.recorder) is None:
+            return None
+        self.heater.recorder = None
+        if self._cancel_capture_flush is not None:
+            self._cancel_capture_flush()
+            self._cancel_capture_flush = None
+        await recorder.async_flush()
+        LOGGER.info(
+            "(%s) Captured %d raw frames to %s",
+            self.address,
+            recorder.frames,
+            recorder.path,
+        )
+        return recorder.path
+
+    async def _async_flush_capture(self, _now: Any) -> None:
+        if (recorder := self.heater.recorder) is not None:
+            await recorder.async_flush()
 
     async def async_shutdown(self) -> None:
         LOGGER.debug("Shutdown")
+        await self.async_stop_capture()
+        for cancel in self._cancel_telemetry_timers:
+            cancel()
+        self._cancel_idle_check()
+        if self._sampling is not None:
+            self._sampling.cancel()
+        if self._releasing is not None:
+            self._releasing.cancel()
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+        self._remove_frame_listener()
+        self._remove_disconnect_listener()
+        self._remove_advertisement_callback()
+        self._clear_expectation()
+        self.arbiter.async_unregister(self.address)
+        # Reads are shielded from whoever's waiting on them, so cancelling the waiters leaves the read itself running.
+        await self.pipeline.async_shutdown()
         await super().async_shutdown()
         if self.heater.is_connected:
             await self.heater.disconnect()
 
     async def async_find_device(self):
+        """
+        Reconnect to the heater, or wait for the reconnect that's already underway.
+
+        This gets called from the coordinator and from every entity that hits an error. Without sharing one
+        attempt, a flaky link means a pile of parallel reconnects all fighting each other over the same slot.
+        """
+        if self._reconnect is None:
+            if (wait := self._reconnect_not_before - time.monotonic()) > 0:
+                raise UpdateFailed(
+                    f"Not reconnecting to {self.address} for another {wait:.1f} s after "
+                    f"{self.reconnect_failures} failed attempts"
+                )
+            self._reconnect = self.hass.async_create_background_task(
+                self._async_reconnect_once(), f"{DOMAIN} {self.address} reconnect"
+            )
+            self._reconnect.add_done_callback(self._reconnect_done)
+        else:
+            LOGGER.debug("(%s) Joining reconnect already in progress", self.address)
+        await asyncio.shield(self._reconnect)
+
+    async def _async_reconnect_once(self) -> None:
         LOGGER.debug("Trying to reconnect")
-        await close_stale_connections_by_address(self.address)
+        self.heater.stats.reconnects += 1
+        try:
+            with self.heater.stats.time("reconnect"):
+                await self._async_reconnect()
+        except Exception:
+            self.reconnect_failures += 1
+            if self.reconnect_failures >= RECONNECT_BREAKER_THRESHOLD:
+                delay = RECONNECT_BREAKER_COOLDOWN
+                LOGGER.warning(
+                    "(%s) %d reconnects in a row failed, giving it a rest for %d s",
+                    self.address,
+                    self.reconnect_failures,
+                    delay,
+                )
+            else:
+                delay = min(
+                    RECONNECT_BACKOFF * 2 ** (self.reconnect_failures - 1),
+                    RECONNECT_BACKOFF_MAX,
+                ) * random.uniform(0.5, 1.0)
+            self._reconnect_not_before = time.monotonic() + delay
+            raise
+        self.reconnect_failures = 0
+        self._reconnect_not_before = 0.0
+
+    def _reconnect_done(self, task: asyncio.Task[None]) -> None:
+        self._reconnect = None
+        if not task.cancelled():
+            task.exception()
+
+    async def _async_reconnect(self) -> None:
+        with self.heater.stats.time("close_stale_connections"):
+            await close_stale_connections_by_address(self.address)
 
         device = bluetooth.async_ble_device_from_address(
             self.hass, self.address, connectable=True
@@ -58,16 +835,59 @@ class HcaloryCoordinator(DataUpdateCoordinator[hcalory_control.heater.HeaterResp
         self.heater.device = device
 
         try:
-            await self.heater.get_data()
+            await self.pipeline.get_data()
         except BleakError as e:
             raise UpdateFailed(f"Failed to connect to {self.address}") from e
 
     async def _async_update_data(self) -> hcalory_control.heater.HeaterResponse:
+        if self._can_stay_passive():
+            LOGGER.debug(
+                "(%s) Heater is off and advertising, not connecting", self.address
+            )
+            return self.data
+        # Reconnecting can fail with anything a read can, not just UpdateFailed, and every one of them is a failed update.
+        errors: tuple[type[Exception], ...] = (UpdateFailed, *read_errors())
+        try:
+            data = await self._async_poll()
+        except errors as err:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= DORMANT_AFTER_FAILURES:
+                # Straight back to sleep if the one connect an advertisement woke us up for didn't work either.
+                self._async_go_dormant()
+            else:
+                self.update_interval = backoff_interval(self.consecutive_failures)
+                LOGGER.debug(
+                    "(%s) %d consecutive failed updates, next attempt in %s",
+                    self.address,
+                    self.consecutive_failures,
+                    self.update_interval,
+                )
+            # Until we've heard from the heater, what we restored on startup beats showing nothing at all.
+            if self.restored:
+                return self.data
+            if isinstance(err, UpdateFailed):
+                raise
+            raise UpdateFailed(
+                f"Couldn't get data from {self.address}: {type(err).__name__}"
+            ) from err
+        self._last_frame_at = time.monotonic()
+        self._advertisement_changed = False
+        self.restored = False
+        self.consecutive_failures = 0
+        self.dormant = False
+        self.released = False
+        data = self._reconcile(data)
+        self.update_interval = self._next_interval(data)
+        return data
+
+    async def _async_poll(self) -> hcalory_control.heater.HeaterResponse:
         LOGGER.debug("Polling device %s", self.address)
 
         try:
             if not self.heater.is_connected:
-                LOGGER.warning(
+                # Nothing to warn about if we're the ones who let go of it.
+                LOGGER.log(
+                    logging.DEBUG if self.released else logging.WARNING,
                     "Heater %s with addr %s is not connected. Trying to reconnect.",
                     self.name,
                     self.address,
@@ -80,17 +900,16 @@ class HcaloryCoordinator(DataUpdateCoordinator[hcalory_control.heater.HeaterResp
             LOGGER.debug(
                 "Fetching data from %s (addr %s) now.", self.name, self.address
             )
-            async with asyncio.timeout(45.0):
-                data = await self.heater.get_data()
-            LOGGER.debug(json.dumps(data.asdict(), indent=4, sort_keys=True))
+            self._polling = True
+            try:
+                # The pipeline gives the read its own deadline once it has the heater. Time spent queued doesn't count.
+                data = await self.pipeline.get_data()
+            finally:
+                self._polling = False
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug(json.dumps(data.asdict(), indent=4, sort_keys=True))
             return data
-        except (
-            BleakError,
-            ValueError,
-            aioesphomeapi.core.BluetoothGATTAPIError,
-            aioesphomeapi.core.BluetoothConnectionDroppedError,
-            TimeoutError,
-        ) as err:
+        except read_errors() as err:
             LOGGER.exception(
                 "Error getting data from device with addr %s", self.address
             )
@@ -0,0 +1,58 @@
+"""Diagnostics support for the Hcalory BLE integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import hcalory_control.heater
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import HcaloryCoordinator
+
+# The heater's MAC address, wherever it turns up. The entry's unique ID and title have it in them too.
+TO_REDACT = {CONF_ADDRESS, "address", "mac_address", "unique_id", "title"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry[hcalory_control.heater.HCaloryHeater]
+) -> dict[str, Any]:
+    coordinator: HcaloryCoordinator = hass.data[DOMAIN][entry.entry_id]
+    advertised = coordinator.advertised
+    diagnostics = {
+        "entry": entry.as_dict(),
+        "name": coordinator.name,
+        "data": coordinator.data.asdict() if coordinator.data is not None else None,
+        "restored": coordinator.restored,
+        "connected": coordinator.heater.is_connected,
+        "update_interval": str(coordinator.update_interval),
+        "consecutive_failures": coordinator.consecutive_failures,
+        "reconnect_failures": coordinator.reconnect_failures,
+        "dormant": coordinator.dormant,
+        "released": coordinator.released,
+        "idle_releases": coordinator.idle_releases,
+        "connection_hold": round(coordinator.connection_hold(), 1),
+        "path": coordinator.path,
+        "paths": coordinator.paths.as_dict(),
+        "advertised": {
+            "rssi": advertised.rssi,
+            "source": advertised.source,
+            "payload": advertised.payload.hex()
+            if advertised.payload is not None
+            else None,
+        }
+        if advertised is not None
+        else None,
+        "pipeline": {
+            "queue_depth": coordinator.pipeline.queue_depth,
+            "last_wait": round(coordinator.pipeline.last_wait, 4),
+            "max_wait": round(coordinator.pipeline.max_wait, 4),
+            "read_timeouts": coordinator.pipeline.read_timeouts(),
+        },
+        "stats": coordinator.heater.stats.as_dict(),
+        "adapters": coordinator.arbiter.async_usage(),
+    }
+    return async_redact_data(diagnostics, TO_REDACT)
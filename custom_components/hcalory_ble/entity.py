@@ -1,8 +1,9 @@
-from typing import Generic, TypeVar
+from typing import Any, Generic, TypeVar
 
 import hcalory_control.heater
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import callback
 from homeassistant.helpers.device_registry import CONNECTION_BLUETOOTH, DeviceInfo
 from homeassistant.helpers.entity import EntityDescription
 from homeassistant.helpers.typing import UndefinedType
@@ -16,6 +17,9 @@ _T = TypeVar("_T", bound=EntityDescription)
 
 
 class HcaloryHeaterEntity(CoordinatorEntity[HcaloryCoordinator], Generic[_T]):
+    # The coordinator field this entity shows, if it isn't the same as the description's key.
+    data_field: str | None = None
+
     def __init__(
         self,
         coordinator: HcaloryCoordinator,
@@ -33,10 +37,23 @@ class HcaloryHeaterEntity(CoordinatorEntity[HcaloryCoordinator], Generic[_T]):
             name=coordinator.name,
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # No point writing the same state again. The recorder would keep a row for every one of them.
+        if self.coordinator.has_changed(self.data_field or self.entity_description.key):
+            super()._handle_coordinator_update()
+
     @property
     def name(self) -> str | UndefinedType | None:
         return f"{self.coordinator.name} {self.entity_description.key.replace("_", " ").title()}"
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        # Flag values that came from the startup snapshot so nobody mistakes them for live data.
+        if self.coordinator.restored:
+            return {"restored": True}
+        return None
+
     @property
     def unique_id(self) -> str | None:
         return slugify(f"{self.coordinator.name}_{self.entity_description.key}")
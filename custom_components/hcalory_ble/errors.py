@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import sys
+
+from bleak import BleakError
+
+
+def connection_errors() -> tuple[type[Exception], ...]:
+    """
+    The exceptions that mean the Bluetooth link to a heater fell over, for whichever backends are in use.
+
+    ESPHome proxies raise their own exceptions on top of BleakError. aioesphomeapi takes a good while to import
+    (it drags protobuf in with it), and if nothing has imported it yet there's no proxy around to raise them.
+    So rather than import it ourselves, only go looking for it once somebody else has.
+    """
+    esphome = sys.modules.get("aioesphomeapi.core")
+    if esphome is None:
+        return (BleakError,)
+    return (
+        BleakError,
+        esphome.BluetoothGATTAPIError,
+        esphome.BluetoothConnectionDroppedError,
+    )
+
+
+def read_errors() -> tuple[type[Exception], ...]:
+    """Everything asking the heater for a frame can fail with: a dropped link, a garbled frame or no answer at all."""
+    return (*connection_errors(), ValueError, TimeoutError)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+import bleak
+import hcalory_control.heater
+
+from .capture import Direction, FrameRecorder
+from .const import LOGGER
+from .stats import HeaterStats
+
+FrameListener = Callable[[hcalory_control.heater.HeaterResponse], None]
+DisconnectListener = Callable[[], None]
+
+
+class HcaloryHeater(hcalory_control.heater.HCaloryHeater):
+    """
+    HCaloryHeater that hands every status frame it receives to registered listeners.
+
+    hcalory_control already subscribes to the read characteristic on every (re)connect and dumps
+    whatever comes in on a queue for get_data() to pick up. We piggyback on that subscription so the
+    coordinator sees frames the moment they arrive, no matter who asked for them (or if nobody did).
+    """
+
+    def __init__(self, device: bleak.BLEDevice, **kwargs) -> None:
+        super().__init__(device, **kwargs)
+        self._frame_listeners: list[FrameListener] = []
+        self._disconnect_listeners: list[DisconnectListener] = []
+        self.stats: HeaterStats = HeaterStats()
+        # Set while somebody wants every raw frame going either way written down.
+        self.recorder: FrameRecorder | None = None
+
+    def _capture(self, direction: Direction, data: bytes | bytearray) -> None:
+        if self.recorder is not None:
+            self.recorder.record(direction, bytes(data))
+
+    def add_frame_listener(self, listener: FrameListener) -> Callable[[], None]:
+        self._frame_listeners.append(listener)
+
+        def remove_listener() -> None:
+            if listener in self._frame_listeners:
+                self._frame_listeners.remove(listener)
+
+        return remove_listener
+
+    def add_disconnect_listener(
+        self, listener: DisconnectListener
+    ) -> Callable[[], None]:
+        """Call listener every time the connection goes away, whether we meant it to or not."""
+        self._disconnect_listeners.append(listener)
+
+        def remove_listener() -> None:
+            if listener in self._disconnect_listeners:
+                self._disconnect_listeners.remove(listener)
+
+        return remove_listener
+
+    def handle_disconnect(self, client: bleak.BleakClient) -> None:
+        super().handle_disconnect(client)
+        for listener in list(self._disconnect_listeners):
+            listener()
+
+    async def ensure_connection(self, reason: str = "") -> None:
+        """Connect to the heater if we aren't already, the same way sending it a command would."""
+        await self._ensure_connection(reason)
+
+    async def _ensure_connection(self, connection_reason: str = "") -> None:
+        if self.is_connected:
+            return await super()._ensure_connection(connection_reason)
+        with self.stats.time("connect"):
+            await super()._ensure_connection(connection_reason)
+
+    async def data_pump_handler(
+        self, characteristic: bleak.BleakGATTCharacteristic, data: bytearray
+    ) -> None:
+        self._capture(Direction.RECEIVED, data)
+        await super().data_pump_handler(characteristic, data)
+        try:
+            response = hcalory_control.heater.HeaterResponse.unpack(bytes(data))
+        except ValueError:
+            LOGGER.debug(
+                "(%s) Ignoring undecodable frame: %s", self.device.address, data.hex()
+            )
+            return
+        for listener in list(self._frame_listeners):
+            listener(response)
+
+    async def get_data(
+        self, hedge_after: float | None = None
+    ) -> hcalory_control.heater.HeaterResponse:
+        """
+        Ask the heater for a frame and wait for it.
+
+        With hedge_after, every time that many seconds go by without a reply we ask again. Either the question or
+        the answer went missing, and the first good frame to come back from any of the asks wins. Whoever calls this
+        is responsible for giving up eventually.
+
+        How long the reply took after the pump_data went out is recorded as a round_trip, unless we had to ask
+        again. After that there's no telling which ask a reply is answering.
+        """
+        # Frames the heater pushed on its own pile up on the queue. If we don't toss them first,
+        # get_data() hands back whatever was sitting at the front instead of the answer to our pump_data.
+        while not self._data_pump_queue.empty():
+            self._data_pump_queue.get_nowait()
+        await self.send_command(hcalory_control.heater.Command.pump_data)
+        asked_at = time.monotonic()
+        if hedge_after is None:
+            frame = await self._data_pump_queue.get()
+            self.heater_response = hcalory_control.heater.HeaterResponse.unpack(
+                bytes(frame)
+            )
+            self.stats.record("round_trip", time.monotonic() - asked_at)
+            return self.heater_response
+        hedged = False
+        while True:
+            try:
+                async with asyncio.timeout(hedge_after):
+                    frame = await self._data_pump_queue.get()
+            except TimeoutError:
+                self.stats.hedges += 1
+                hedged = True
+                LOGGER.debug(
+                    "(%s) No reply after %.2f s, asking again",
+                    self.device.address,
+                    hedge_after,
+                )
+                await self.send_command(hcalory_control.heater.Command.pump_data)
+                continue
+            try:
+                self.heater_response = hcalory_control.heater.HeaterResponse.unpack(
+                    bytes(frame)
+                )
+            except ValueError:
+                # data_pump_handler already logged it. Something better might still be on its way.
+                continue
+            if not hedged:
+                self.stats.record("round_trip", time.monotonic() - asked_at)
+            return self.heater_response
+
+    async def send_command(self, command: hcalory_control.heater.Command) -> None:
+        await super().send_command(command)
+        self._capture(Direction.SENT, command)
@@ -14,6 +14,7 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from .const import DOMAIN, LOGGER
 from .coordinator import HcaloryCoordinator
 from .entity import HcaloryHeaterEntity
+from .ramp import RAMP_TIMEOUT, RampResult, async_ramp_setpoint
 
 
 async def async_setup_entry(
@@ -43,17 +44,16 @@ class HcalorySettingNumber(HcaloryHeaterEntity, NumberEntity):
         entity_description: NumberEntityDescription,
     ):
         super().__init__(coordinator, entry, entity_description)
-        self.change_lock = asyncio.Lock()
+        # The setpoint we're headed for and the ramp that's taking us there, if there is one.
+        self._target: int = 0
+        self._ramp: asyncio.Task[None] | None = None
+        # The most recent setpoint change, mostly so we can see how long they take.
+        self.last_ramp: RampResult | None = None
 
     @property
     def native_value(self) -> float | None:
-        if self.coordinator.data is not None:
-            LOGGER.debug(
-                "(%s) request for native_value of Setting number yielded %d",
-                self.address,
-                float(self.coordinator.data.heater_setting),
-            )
-            return float(self.coordinator.data.heater_setting)
+        if (values := self.coordinator.values) is not None:
+            return values.heater_setting
         return None
 
     async def async_set_native_value(self, value: float) -> None:
@@ -64,85 +64,69 @@ class HcalorySettingNumber(HcaloryHeaterEntity, NumberEntity):
             )
             return
 
-        async with self.change_lock:
-            original_value = self.coordinator.data.heater_setting
-            current_value = original_value
+        self._target = int(value)
+        LOGGER.debug(
+            "(%s) Temperature change called. Value from coordinator is %d, new value is %d",
+            self.address,
+            self.coordinator.data.heater_setting,
+            self._target,
+        )
+        target = self._target
+        self.coordinator.async_set_optimistic(
+            f"setpoint change to {target}",
+            lambda data: data.heater_setting == target,
+            timeout=RAMP_TIMEOUT,
+            heater_setting=target,
+        )
+        # Dragging a slider fires off a pile of these. Rather than replaying every one of them from the top, whoever
+        # shows up while a ramp is queued or running just moves the target and waits for that ramp to get there.
+        # A ramp that's already finished won't look at the new target, even if _ramp_done hasn't gotten to it yet.
+        # It's the entry's task, so unloading the entry cancels it rather than leaving it pressing buttons.
+        if self._ramp is None or self._ramp.done():
+            self._ramp = self.entry.async_create_background_task(
+                self.coordinator.hass,
+                self._async_ramp(),
+                f"{DOMAIN} {self.address} setpoint ramp",
+            )
+            self._ramp.add_done_callback(self._ramp_done)
+        else:
             LOGGER.debug(
-                "(%s) Temperature change called. Native value is %d, value from coordinator is is %d, new value is %d",
-                self.address,
-                self.native_value,
-                original_value,
-                int(value),
+                "(%s) Redirecting setpoint change already in progress", self.address
             )
-            new_value = int(value)
-            while current_value != new_value:
-                assumed_state = current_value
-                iterator = range(
-                    min((current_value, new_value)), max((current_value, new_value))
-                )
-                LOGGER.debug(
-                    "(%s) changing temperature from %d to %d",
-                    self.address,
-                    current_value,
-                    new_value,
-                )
-                if current_value > new_value:
-                    LOGGER.debug("(%s) change is a reduction", self.address)
+        await asyncio.shield(self._ramp)
 
-                    # Mypy is being really dumb because ranges are dumb. If this were a regular
-                    # reversible iterable, then reassigning the iterator variable to the reversed
-                    # value would be fine. Instead, mypy says this:
-                    # error: Incompatible types in assignment (expression has type "reversed[int]", variable has type "range")
-                    # That is dumb so I'm doing this:
-                    iterator = reversed(iterator)  # type: ignore
-                for next_value in iterator:
-                    LOGGER.debug(
-                        "(%s) Assumed state: %d, next value: %d",
-                        self.address,
-                        assumed_state,
-                        next_value,
-                    )
-                    if assumed_state < next_value:
-                        assumed_state += 1
-                        await self.heater.send_command(
-                            hcalory_control.heater.Command.up
-                        )
-                    elif assumed_state > next_value:
-                        assumed_state -= 1
-                        await self.heater.send_command(
-                            hcalory_control.heater.Command.down
-                        )
-                    await asyncio.sleep(0.1)
-                # Going up will be off by one. Gotta love non-inclusive range operations.
-                if assumed_state < new_value:
-                    assumed_state += 1
-                    await self.heater.send_command(hcalory_control.heater.Command.up)
-                    LOGGER.debug(
-                        "(%s) Assumed state after final increase: %d",
-                        self.address,
-                        assumed_state,
-                    )
-                await self.coordinator.async_refresh()
-                await asyncio.sleep(10.0)
-                if current_value := self.coordinator.data.heater_setting is not None:
-                    LOGGER.debug(
-                        "(%s) Current value after everything: %d, original value: %d",
-                        self.address,
-                        current_value,
-                        original_value,
-                    )
-                    return
-                    if current_value == original_value:
-                        LOGGER.warning(
-                            "(%s) Attempt to change set point from %d to %d did not actually change anything. "
-                            "Giving up so we don't accidentally change the setpoint to something bonkers.",
-                            self.address,
-                            original_value,
-                            new_value,
-                        )
-                        return
-                else:
-                    LOGGER.warning(
-                        "(%s) Can't get current value for heater setpoint. Giving up."
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        if self._ramp is not None:
+            self._ramp.cancel()
+
+    async def _async_ramp(self) -> None:
+        try:
+            while True:
+                async with self.coordinator.pipeline.session("setpoint ramp") as heater:
+                    self.last_ramp = await async_ramp_setpoint(
+                        heater, lambda: self._target
                     )
-                    return
+                # The target can still move after the ramp's last look at it, while the session is wrapping up.
+                # Anyone who moved it is waiting on this task, so go around again for them.
+                if not self.last_ramp.reached or self.last_ramp.target == self._target:
+                    break
+        except Exception:
+            self.coordinator.async_rollback()
+            raise
+        if not self.last_ramp.reached:
+            self.coordinator.async_rollback()
+        LOGGER.debug(
+            "(%s) Setting is %d after ramping to %d: %d commands in %.2f s",
+            self.address,
+            self.last_ramp.setting,
+            self.last_ramp.target,
+            self.last_ramp.commands_sent,
+            self.last_ramp.duration,
+        )
+
+    def _ramp_done(self, task: asyncio.Task[None]) -> None:
+        if task is self._ramp:
+            self._ramp = None
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Any
+
+from homeassistant.components import bluetooth
+from homeassistant.core import HomeAssistant, callback
+
+# How much each new read moves a path's success rate and round trip time. Higher forgets the past quicker.
+PATH_SMOOTHING = 0.2
+
+
+@dataclasses.dataclass(slots=True)
+class PathStats:
+    """How reads through one proxy have been going. A path we've never used gets the benefit of the doubt."""
+
+    success_rate: float = 1.0
+    # Smoothed round trip of a read, in seconds. None until one has gone through.
+    latency: float | None = None
+    reads: int = 0
+
+    def record(self, latency: float | None) -> None:
+        """Add a read that took latency seconds, or failed if latency is None."""
+        self.reads += 1
+        self.success_rate += PATH_SMOOTHING * (
+            (latency is not None) - self.success_rate
+        )
+        if latency is None:
+            return
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += PATH_SMOOTHING * (latency - self.latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 4) if self.latency is not None else None,
+            "reads": self.reads,
+        }
+
+
+class PathHistory:
+    """
+    How reads of one heater have gone through each adapter or proxy it's been connected through.
+
+    Home Assistant picks the adapter or proxy every time we connect, going by signal strength, free slots and
+    failed connects, and there's no supported way to ask it for a particular one. What's left for us is keeping
+    track of which one we actually ended up on, so the diagnostics can show how each of them has been doing.
+    """
+
+    def __init__(self) -> None:
+        self.stats: dict[str, PathStats] = {}
+
+    def record(self, source: str, latency: float | None) -> None:
+        stats = self.stats.get(source)
+        if stats is None:
+            stats = self.stats[source] = PathStats()
+        stats.record(latency)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {source: stats.as_dict() for source, stats in self.stats.items()}
+
+
+@callback
+def async_connected_source(hass: HomeAssistant, address: str) -> str | None:
+    """
+    The adapter or proxy that's holding our connection to address, or None if none of them will say.
+
+    Local adapters list connected devices by address and ESPHome proxies by the address as a number, so both get
+    checked. Home Assistant releases older than the scanner allocation API just get None, since which path a read
+    went through is nice to know and never worth failing the read over.
+    """
+    current_scanners = getattr(bluetooth, "async_current_scanners", None)
+    if current_scanners is None:
+        return None
+    as_number = int(address.replace(":", ""), 16)
+    for scanner in current_scanners(hass):
+        get_allocations = getattr(scanner, "get_allocations", None)
+        if get_allocations is None or (allocations := get_allocations()) is None:
+            continue
+        allocated: list[str | int] = list(allocations.allocated)
+        if address in allocated or as_number in allocated:
+            return scanner.source
+    return None
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import hcalory_control.heater
+
+from .arbiter import SlotArbiter
+from .const import LOGGER
+from .heater import HcaloryHeater
+
+# How long a read gets to connect, and to get its answer, once it's actually at the front of the line. Waiting in the
+# queue doesn't count.
+READ_TIMEOUT = 45.0
+# Once we've timed enough round trips to know what normal looks like for a heater, a read that's been waiting on a
+# reply for HEDGE_FACTOR times the p99 asks the heater again, and one that's been going for READ_DEADLINE_FACTOR
+# times the p99 is given up on so recovery can start, instead of everything sitting on a stalled read for
+# READ_TIMEOUT. Only round trips that got an answer to their first ask count, or every hedge would make the next
+# read slower to hedge.
+HEDGE_MIN_SAMPLES = 20
+HEDGE_FACTOR = 2.0
+READ_DEADLINE_FACTOR = 6.0
+# However slow the heater has been, a read gets to ask at least this many times before its deadline.
+MIN_ASKS_PER_READ = 4
+# Floors, so a run of lucky reads on a quiet proxy doesn't leave us hair-trigger.
+MIN_HEDGE_AFTER = 0.5  # seconds
+MIN_READ_DEADLINE = 5.0  # seconds
+
+
+class HeaterPipeline:
+    """
+    Every conversation with a heater goes through here, one at a time.
+
+    The heater only has one status characteristic and hcalory_control hands out replies in the order they
+    arrive, so a poll landing in the middle of a setpoint ramp or a power toggle can grab the wrong frame or
+    time out. Operations are run in the order they were queued, and concurrent get_data() calls share a
+    single read.
+
+    Don't call get_data() or send_command() on the pipeline from inside a session. Use the heater the
+    session hands you instead, otherwise you're waiting on yourself.
+    """
+
+    def __init__(
+        self,
+        heater: HcaloryHeater,
+        arbiter: SlotArbiter | None = None,
+        on_read: Callable[[float | None], None] | None = None,
+    ) -> None:
+        self.heater: HcaloryHeater = heater
+        # Hands out the adapter's connection slots between us and every other heater on it.
+        self.arbiter: SlotArbiter | None = arbiter
+        # Told how long every read took once it had the heater, or None if it failed.
+        self._on_read = on_read
+        self._lock = asyncio.Lock()
+        self._read: asyncio.Task[hcalory_control.heater.HeaterResponse] | None = None
+        # Operations queued or running right now.
+        self.queue_depth: int = 0
+        # True while a read has the heater, as opposed to waiting its turn for it.
+        self.reading: bool = False
+        # How long operations sat in the queue before they got the heater, in seconds.
+        self.last_wait: float = 0.0
+        self.max_wait: float = 0.0
+
+    @property
+    def address(self) -> str:
+        return self.heater.device.address
+
+    @asynccontextmanager
+    async def session(self, reason: str) -> AsyncIterator[HcaloryHeater]:
+        queued_at = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._lock, self._adapter_slot():
+                self.last_wait = time.monotonic() - queued_at
+                self.max_wait = max(self.max_wait, self.last_wait)
+                LOGGER.debug(
+                    "(%s) Starting %s after waiting %.3f s, queue depth %d",
+                    self.address,
+                    reason,
+                    self.last_wait,
+                    self.queue_depth,
+                )
+                yield self.heater
+        finally:
+            self.queue_depth -= 1
+
+    def read_timeouts(self) -> tuple[float | None, float]:
+        """When the next read asks again (None for never), and when it gives up altogether, in seconds."""
+        stats = self.heater.stats.operations.get("round_trip")
+        if stats is None or len(stats.samples) < HEDGE_MIN_SAMPLES:
+            return None, READ_TIMEOUT
+        p99 = stats.percentile(99)
+        assert p99 is not None
+        deadline = min(max(p99 * READ_DEADLINE_FACTOR, MIN_READ_DEADLINE), READ_TIMEOUT)
+        hedge_after = min(
+            max(p99 * HEDGE_FACTOR, MIN_HEDGE_AFTER), deadline / MIN_ASKS_PER_READ
+        )
+        return hedge_after, deadline
+
+    @asynccontextmanager
+    async def _adapter_slot(self) -> AsyncIterator[None]:
+        if self.arbiter is None:
+            yield
+            return
+        async with self.arbiter.slot(self.heater):
+            yield
+
+    async def get_data(self) -> hcalory_control.heater.HeaterResponse:
+        if self._read is None:
+            self._read = asyncio.create_task(self._async_read())
+            self._read.add_done_callback(self._read_done)
+        else:
+            LOGGER.debug("(%s) Joining read already in flight", self.address)
+        # Shielded so one caller giving up doesn't cancel the read out from under everybody else.
+        return await asyncio.shield(self._read)
+
+    async def async_shutdown(self) -> None:
+        """Cancel the read in flight, if there is one, and wait for it to finish going away."""
+        if (read := self._read) is None:
+            return
+        read.cancel()
+        # Not just awaited, because the read's CancelledError isn't ours and neither is anything else it raises.
+        await asyncio.gather(read, return_exceptions=True)
+
+    async def send_command(self, command: hcalory_control.heater.Command) -> None:
+        async with self.session(command.name) as heater:
+            with heater.stats.time("send_command"):
+                await heater.send_command(command)
+
+    async def _async_read(self) -> hcalory_control.heater.HeaterResponse:
+        async with self.session("get_data") as heater:
+            started = time.monotonic()
+            self.reading = True
+            try:
+                with heater.stats.time("get_data"):
+                    # Connecting takes as long as it takes and has nothing to do with how fast the heater answers,
+                    # so it gets READ_TIMEOUT. The deadline and hedging are only for the round trip after it.
+                    async with asyncio.timeout(READ_TIMEOUT):
+                        await heater.ensure_connection("get_data")
+                    hedge_after, deadline = self.read_timeouts()
+                    async with asyncio.timeout(deadline):
+                        data = await heater.get_data(hedge_after)
+            except Exception:
+                if self._on_read is not None:
+                    self._on_read(None)
+                raise
+            finally:
+                self.reading = False
+            if self._on_read is not None:
+                self._on_read(time.monotonic() - started)
+            return data
+
+    def _read_done(
+        self, task: asyncio.Task[hcalory_control.heater.HeaterResponse]
+    ) -> None:
+        self._read = None
+        # If every caller gave up on this read, nobody is left to look at the exception. Look at it here so
+        # asyncio doesn't complain about it going unretrieved.
+        if not task.cancelled():
+            task.exception()
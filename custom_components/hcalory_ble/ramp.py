@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from collections.abc import Callable
+
+import hcalory_control.heater
+
+from .const import LOGGER
+from .heater import HcaloryHeater
+
+# The heater only knows "one up" and "one down", so a setpoint change is a string of single steps. We fire off
+# this many back to back, then read the setting back to see where we actually landed.
+RAMP_BURST_SIZE = 5
+# If a read shows the setting didn't budge, give the heater this long to catch up before reading again.
+RAMP_SETTLE_DELAY = 0.25
+# How many reads in a row are allowed to show no progress before we decide the heater is ignoring us.
+RAMP_MAX_STALLS = 4
+RAMP_TIMEOUT = 30.0
+
+
+@dataclasses.dataclass(frozen=True)
+class RampResult:
+    target: int
+    setting: int
+    commands_sent: int
+    # Seconds from the first read to the read that confirmed the final setting.
+    duration: float
+
+    @property
+    def reached(self) -> bool:
+        return self.setting == self.target
+
+
+async def async_ramp_setpoint(
+    heater: HcaloryHeater, target: Callable[[], int]
+) -> RampResult:
+    """
+    Step the heater's setting to target(), checking the real setting after every burst.
+
+    Expects to be run inside a pipeline session so nothing else reads frames out from under it. Overshoot and
+    dropped steps sort themselves out since every burst is sized from what the heater last reported, not from
+    what we think we sent. target is asked again before every burst, so a newer target just redirects the
+    ramp from wherever the heater currently is.
+    """
+    started = time.monotonic()
+    commands_sent = 0
+    stalls = 0
+    async with asyncio.timeout(RAMP_TIMEOUT):
+        setting = (await heater.get_data()).heater_setting
+        while setting != (current_target := target()):
+            remaining = current_target - setting
+            command = (
+                hcalory_control.heater.Command.up
+                if remaining > 0
+                else hcalory_control.heater.Command.down
+            )
+            for _ in range(min(abs(remaining), RAMP_BURST_SIZE)):
+                await heater.send_command(command)
+                commands_sent += 1
+            previous_setting = setting
+            setting = (await heater.get_data()).heater_setting
+            LOGGER.debug(
+                "(%s) Ramping to %d, heater reports %d after %d commands",
+                heater.device.address,
+                current_target,
+                setting,
+                commands_sent,
+            )
+            if setting != previous_setting or current_target != target():
+                stalls = 0
+                continue
+            stalls += 1
+            if stalls >= RAMP_MAX_STALLS:
+                LOGGER.warning(
+                    "(%s) Setting stuck at %d on the way to %d. Giving up so we don't accidentally "
+                    "change the setpoint to something bonkers.",
+                    heater.device.address,
+                    setting,
+                    current_target,
+                )
+                break
+            await asyncio.sleep(RAMP_SETTLE_DELAY)
+            setting = (await heater.get_data()).heater_setting
+    return RampResult(
+        target=target(),
+        setting=setting,
+        commands_sent=commands_sent,
+        duration=time.monotonic() - started,
+    )
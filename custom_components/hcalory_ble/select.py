@@ -1,5 +1,3 @@
-import asyncio
-
 import hcalory_control.heater
 from homeassistant.components.select import SelectEntity, SelectEntityDescription
 from homeassistant.config_entries import ConfigEntry
@@ -31,22 +29,19 @@ async def async_setup_entry(
 class HcaloryModeSelectEntity(HcaloryHeaterEntity, SelectEntity):
     @property
     def current_option(self) -> str | None:
-        if self.coordinator.data is not None:
-            current_mode = hcalory_control.heater.HeaterMode[
-                self.coordinator.data.heater_mode.name
-            ]
-            if (
-                current_mode == hcalory_control.heater.HeaterMode.off
-                or current_mode == hcalory_control.heater.HeaterMode.ignition_failed
-            ):
-                return None
-            return self.coordinator.data.heater_mode.name
+        if (values := self.coordinator.values) is not None:
+            return values.mode_option
+        return None
 
     async def async_select_option(self, option: str) -> None:
         LOGGER.debug("(%s) selecting option %s", self.address, option)
         assert option in self.options
-        await self.heater.send_command(hcalory_control.heater.Command[option])
-        await asyncio.sleep(
-            1
-        )  # TODO yuck, I wish this heater wasn't so grody. Find a way to get rid of this please
-        await self.coordinator.async_refresh()
+        await self.coordinator.pipeline.send_command(
+            hcalory_control.heater.Command[option]
+        )
+        mode = hcalory_control.heater.HeaterMode[option]
+        self.coordinator.async_set_optimistic(
+            f"switch to {option} mode",
+            lambda data: data.heater_mode == mode,
+            heater_mode=mode,
+        )
@@ -1,4 +1,4 @@
-import enum
+from collections.abc import Callable
 from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
@@ -12,13 +12,16 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 
 from .const import DOMAIN, DataAttributeType
 from .coordinator import HcaloryCoordinator
 from .entity import HcaloryHeaterEntity
+from .stats import HeaterStats
+from .telemetry import AGGREGATES, TELEMETRY_FIELDS
 
 _T = TypeVar("_T")
 
@@ -63,16 +66,94 @@ SENSORS: tuple[HcalorySensorDescription, ...] = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class HcalorySensorStatsDescription(SensorEntityDescription):
+    value_fn: Callable[[HeaterStats], StateType]
+
+
+def _latency_ms(operation: str, percentile: int) -> Callable[[HeaterStats], StateType]:
+    def value(stats: HeaterStats) -> StateType:
+        seconds = stats.percentile(operation, percentile)
+        return round(seconds * 1000) if seconds is not None else None
+
+    return value
+
+
+# These are for figuring out why a heater is being flaky, so they're off unless someone goes looking for them.
+STATS_SENSORS: tuple[HcalorySensorStatsDescription, ...] = (
+    HcalorySensorStatsDescription(
+        key="read_latency_p95",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        name="Read Latency P95",
+        value_fn=_latency_ms("get_data", 95),
+    ),
+    HcalorySensorStatsDescription(
+        key="command_latency_p95",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        name="Command Latency P95",
+        value_fn=_latency_ms("send_command", 95),
+    ),
+    HcalorySensorStatsDescription(
+        key="reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        name="Reconnects",
+        value_fn=lambda stats: stats.reconnects,
+    ),
+    HcalorySensorStatsDescription(
+        key="failures",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        name="Failures",
+        value_fn=lambda stats: sum(stats.failures.values()),
+    ),
+)
+
+
+# The telemetry fields are named after the regular sensors, so they borrow those sensors' units and classes.
+TELEMETRY_SENSORS: tuple[SensorEntityDescription, ...] = tuple(
+    SensorEntityDescription(
+        key=f"{description.key}_{aggregate}",
+        device_class=description.device_class,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=description.native_unit_of_measurement,
+        suggested_display_precision=1,
+        name=f"{description.name} {aggregate.title()}",
+    )
+    for description in SENSORS
+    if description.key in TELEMETRY_FIELDS
+    for aggregate in AGGREGATES
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config: ConfigEntry[hcalory_control.heater.HCaloryHeater],
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     coordinator: HcaloryCoordinator = hass.data[DOMAIN][config.entry_id]
-    entities = [
+    entities: list[SensorEntity] = [
         HcalorySensor[HcalorySensorDescription](coordinator, config, entity_description)
         for entity_description in SENSORS
     ]
+    entities.extend(
+        HcalorySensorStats(coordinator, config, entity_description)
+        for entity_description in STATS_SENSORS
+    )
+    entities.extend(
+        HcalorySensorTelemetry(coordinator, config, entity_description)
+        for entity_description in TELEMETRY_SENSORS
+    )
 
     async_add_entities(entities)
 
@@ -90,10 +171,25 @@ class HcalorySensor(
 
     @property
     def native_value(self) -> StateType | date | datetime | Decimal:
-        if self.coordinator.data is not None:
-            data = getattr(
-                self.coordinator.data, self.entity_description.data_attribute
-            )
-            if isinstance(data, enum.Enum):
-                return data.name
-            return data
+        if (values := self.coordinator.values) is not None:
+            return getattr(values, self.entity_description.data_attribute)
+        return None
+
+
+class HcalorySensorStats(HcaloryHeaterEntity, SensorEntity):
+    entity_description: HcalorySensorStatsDescription
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        # Stats move on every update whether or not the heater's data does, so skip the change detection.
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> StateType:
+        return self.entity_description.value_fn(self.coordinator.heater.stats)
+
+
+class HcalorySensorTelemetry(HcaloryHeaterEntity, SensorEntity):
+    @property
+    def native_value(self) -> float | None:
+        return self.coordinator.telemetry_summary.get(self.entity_description.key)
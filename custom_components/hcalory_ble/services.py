@@ -0,0 +1,143 @@
+"""Services for the Hcalory BLE integration."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import hcalory_control.heater
+import homeassistant.helpers.config_validation as cv
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.util import dt as dt_util
+from homeassistant.util.json import JsonValueType
+
+from .apply import MODE_COMMANDS, SETTING_RANGES, DesiredState
+from .const import DOMAIN
+from .coordinator import HcaloryCoordinator
+from .errors import read_errors
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_POWER = "power"
+ATTR_MODE = "mode"
+ATTR_SETTING = "setting"
+SERVICE_APPLY_STATE = "apply_state"
+SERVICE_DUMP_TELEMETRY = "dump_telemetry"
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+
+HEATER_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+APPLY_STATE_SCHEMA = vol.All(
+    HEATER_SCHEMA.extend(
+        {
+            vol.Optional(ATTR_POWER): cv.boolean,
+            vol.Optional(ATTR_MODE): vol.In([mode.name for mode in MODE_COMMANDS]),
+            vol.Optional(ATTR_SETTING): vol.All(
+                vol.Coerce(int), vol.Range(min=1, max=104)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_POWER, ATTR_MODE, ATTR_SETTING),
+)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> HcaloryCoordinator:
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    coordinator: HcaloryCoordinator | None = hass.data.get(DOMAIN, {}).get(entry_id)
+    if coordinator is None:
+        raise ServiceValidationError(
+            f"No Hcalory heater is loaded for config entry {entry_id}"
+        )
+    return coordinator
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    async def async_dump_telemetry(call: ServiceCall) -> ServiceResponse:
+        coordinator = _get_coordinator(hass, call)
+        samples: list[JsonValueType] = [*coordinator.telemetry.as_list()]
+        return {"address": coordinator.address, "samples": samples}
+
+    async def async_apply_state(call: ServiceCall) -> ServiceResponse:
+        coordinator = _get_coordinator(hass, call)
+        desired = DesiredState(
+            power=call.data.get(ATTR_POWER),
+            mode=hcalory_control.heater.HeaterMode[call.data[ATTR_MODE]]
+            if ATTR_MODE in call.data
+            else None,
+            setting=call.data.get(ATTR_SETTING),
+        )
+        mode = desired.mode
+        if mode is None and coordinator.data is not None:
+            mode = coordinator.data.heater_mode
+        if desired.setting is not None and mode in SETTING_RANGES:
+            lowest, highest = SETTING_RANGES[mode]
+            if not lowest <= desired.setting <= highest:
+                raise ServiceValidationError(
+                    f"A setting of {desired.setting} is out of range for {mode.name} mode "
+                    f"({lowest}-{highest})"
+                )
+        # Reconnecting is part of applying the state, so a reconnect in backoff is as much a failure as a dropped link.
+        errors: tuple[type[Exception], ...] = (UpdateFailed, *read_errors())
+        try:
+            result = await coordinator.async_apply_state(desired)
+        except errors as e:
+            raise HomeAssistantError(
+                f"Couldn't apply state to heater {coordinator.address}"
+            ) from e
+        return result.as_dict()
+
+    async def async_start_capture(call: ServiceCall) -> ServiceResponse:
+        coordinator = _get_coordinator(hass, call)
+        path = Path(
+            hass.config.path(
+                DOMAIN,
+                f"{coordinator.address.replace(':', '').lower()}-"
+                f"{dt_util.now():%Y%m%d-%H%M%S}.hcap",
+            )
+        )
+        try:
+            coordinator.async_start_capture(path)
+        except ValueError as e:
+            raise ServiceValidationError(str(e)) from e
+        return {"path": str(path)}
+
+    async def async_stop_capture(call: ServiceCall) -> ServiceResponse:
+        path = await _get_coordinator(hass, call).async_stop_capture()
+        return {"path": str(path) if path is not None else None}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_TELEMETRY,
+        async_dump_telemetry,
+        schema=HEATER_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_APPLY_STATE,
+        async_apply_state,
+        schema=APPLY_STATE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        async_start_capture,
+        schema=HEATER_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_CAPTURE,
+        async_stop_capture,
+        schema=HEATER_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
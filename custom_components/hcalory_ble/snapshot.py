@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hcalory_control.heater
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_VERSION = 1
+# Frames can show up several times a second. The snapshot only has to be good enough to start up with, so
+# batch the writes up.
+SAVE_DELAY = 60  # seconds
+
+
+class HeaterSnapshotStore:
+    """
+    The last frame we got from a heater and the name it goes by, kept on disk per config entry.
+
+    This lets the entry load straight away on startup, before the heater has been found, let alone connected to.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self._store: Store[dict[str, str]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+
+    async def async_load(
+        self,
+    ) -> tuple[str, hcalory_control.heater.HeaterResponse] | None:
+        if (stored := await self._store.async_load()) is None:
+            return None
+        try:
+            return stored["name"], hcalory_control.heater.HeaterResponse.unpack(
+                bytes.fromhex(stored["frame"])
+            )
+        except (KeyError, ValueError):
+            LOGGER.warning("Ignoring unreadable heater snapshot: %s", stored)
+            return None
+
+    @callback
+    def async_save(
+        self, name: str, data: hcalory_control.heater.HeaterResponse
+    ) -> None:
+        self._store.async_delay_save(
+            lambda: {"name": name, "frame": data.pack().hex()}, SAVE_DELAY
+        )
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
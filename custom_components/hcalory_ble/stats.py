@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import collections
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# How many of the most recent timings we keep per operation. Percentiles are worked out over this window, and
+# it's what keeps memory flat no matter how long Home Assistant has been up.
+SAMPLE_WINDOW = 256
+PERCENTILES: tuple[int, ...] = (50, 95, 99)
+
+
+class OperationStats:
+    __slots__ = ("count", "failures", "samples")
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        self.failures: int = 0
+        # Seconds each successful run took, newest last.
+        self.samples: collections.deque[float] = collections.deque(maxlen=SAMPLE_WINDOW)
+
+    def percentile(self, percentile: int) -> float | None:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, len(ordered) * percentile // 100)]
+
+    def as_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {"count": self.count, "failures": self.failures}
+        for percentile in PERCENTILES:
+            value = self.percentile(percentile)
+            result[f"p{percentile}"] = round(value, 4) if value is not None else None
+        return result
+
+
+class HeaterStats:
+    """How long talking to one heater takes, and how often it goes wrong."""
+
+    def __init__(self) -> None:
+        self.operations: dict[str, OperationStats] = {}
+        # Failed operations by exception type name.
+        self.failures: collections.Counter[str] = collections.Counter()
+        self.timeouts: int = 0
+        # Every time the coordinator went looking for the heater, shared attempts counted once. That includes the
+        # first connect after starting up from a snapshot.
+        self.reconnects: int = 0
+        # Extra pump_data requests sent because a reply was slow to show up.
+        self.hedges: int = 0
+
+    @contextmanager
+    def time(self, operation: str) -> Iterator[None]:
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats.count += 1
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            stats.failures += 1
+            self.failures[type(e).__name__] += 1
+            if isinstance(e, TimeoutError):
+                self.timeouts += 1
+            raise
+        stats.samples.append(time.monotonic() - started)
+
+    def record(self, operation: str, seconds: float) -> None:
+        """Add a successful run of operation that had to be timed some other way than with time()."""
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        stats.count += 1
+        stats.samples.append(seconds)
+
+    def percentile(self, operation: str, percentile: int) -> float | None:
+        if (stats := self.operations.get(operation)) is None:
+            return None
+        return stats.percentile(percentile)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "operations": {
+                operation: stats.as_dict()
+                for operation, stats in self.operations.items()
+            },
+            "failures": dict(self.failures),
+            "timeouts": self.timeouts,
+            "reconnects": self.reconnects,
+            "hedges": self.hedges,
+        }
@@ -1,4 +1,3 @@
-import asyncio
 from typing import Any
 
 import bleak
@@ -10,11 +9,14 @@ from homeassistant.components.switch import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import UpdateFailed
 
 from .const import DOMAIN, LOGGER
 from .coordinator import HcaloryCoordinator
 from .entity import HcaloryHeaterEntity
+from .errors import read_errors
 
 
 async def async_setup_entry(
@@ -31,15 +33,12 @@ async def async_setup_entry(
 
 
 class HcalorySwitch(HcaloryHeaterEntity, SwitchEntity):
+    data_field = "running"
+
     @property
     def is_on(self) -> bool | None:
-        if self.coordinator.data is not None:
-            LOGGER.debug(
-                "(%s) running: %s",
-                self.address,
-                self.coordinator.data.running,
-            )
-            return self.coordinator.data.running
+        if (values := self.coordinator.values) is not None:
+            return values.running
         return None
 
     async def async_turn_on(self, **kwargs: Any) -> None:
@@ -49,18 +48,23 @@ class HcalorySwitch(HcaloryHeaterEntity, SwitchEntity):
             self.heater.is_connected,
         )
         try:
-            await self.heater.get_data()
-            await self.heater.send_command(hcalory_control.heater.Command.start_heat)
-            await asyncio.sleep(1.0)
-            await self.heater.get_data()
+            await self.coordinator.pipeline.send_command(
+                hcalory_control.heater.Command.start_heat
+            )
+            if not self.is_on:
+                self.coordinator.async_set_optimistic(
+                    "turn on",
+                    lambda data: data.running,
+                    heater_state=hcalory_control.heater.HeaterState.ignition_received,
+                )
         except (TimeoutError, bleak.BleakError, AttributeError) as e:
-            await self.coordinator.async_find_device()
+            await self._async_reconnect()
             LOGGER.exception(
                 "Encountered exception: %s while turning on switch %s",
                 e,
                 self.address,
             )
-            raise
+            raise HomeAssistantError(f"Couldn't turn on heater {self.address}") from e
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         LOGGER.debug(
@@ -69,15 +73,31 @@ class HcalorySwitch(HcaloryHeaterEntity, SwitchEntity):
             self.heater.is_connected,
         )
         try:
-            await self.heater.get_data()
-            await self.heater.send_command(hcalory_control.heater.Command.stop_heat)
-            await asyncio.sleep(1.0)
-            await self.heater.get_data()
+            await self.coordinator.pipeline.send_command(
+                hcalory_control.heater.Command.stop_heat
+            )
+            if self.is_on:
+                self.coordinator.async_set_optimistic(
+                    "turn off",
+                    lambda data: not data.running,
+                    heater_state=hcalory_control.heater.HeaterState.cooldown_received,
+                )
         except (TimeoutError, bleak.BleakError, AttributeError) as e:
-            await self.coordinator.async_find_device()
+            await self._async_reconnect()
             LOGGER.exception(
                 "Encountered exception: %s while turning off switch %s",
                 e,
                 self.address,
             )
-            raise
+            raise HomeAssistantError(f"Couldn't turn off heater {self.address}") from e
+
+    async def _async_reconnect(self) -> None:
+        # Only so the next command has a connection to use. While reconnects are backing off this fails too, and
+        # what the caller needs to hear about is the command that failed, not that.
+        errors: tuple[type[Exception], ...] = (UpdateFailed, *read_errors())
+        try:
+            await self.coordinator.async_find_device()
+        except errors as e:
+            LOGGER.debug(
+                "(%s) Couldn't reconnect after a failed command: %s", self.address, e
+            )
@@ -0,0 +1,89 @@
+"""A fixed-size window of raw readings, for seeing what the heater does in between the values we publish."""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+import hcalory_control.heater
+
+# At one sample a second while the heater is running, this is the last ten minutes.
+TELEMETRY_WINDOW = 600
+TELEMETRY_FIELDS: tuple[str, ...] = (
+    "voltage",
+    "body_temperature",
+    "ambient_temperature",
+)
+AGGREGATES: tuple[str, ...] = ("min", "max", "mean")
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class TelemetrySample:
+    # time.time(), so it still means something once it's been dumped out of Home Assistant.
+    at: float
+    voltage: float
+    body_temperature: float
+    ambient_temperature: float
+
+    @classmethod
+    def from_response(
+        cls, data: hcalory_control.heater.HeaterResponse, at: float
+    ) -> TelemetrySample:
+        # The heater reports tenths and HeaterResponse rounds them off to whole units. A glow plug sag is
+        # exactly the sort of thing that hides in those tenths, so go straight to the raw fields. They're private,
+        # which is why the manifest pins hcalory-control to the same release as pyproject.toml.
+        return cls(
+            at=at,
+            voltage=data._voltage / 10,
+            body_temperature=int.from_bytes(data._body_temperature, "big") / 10,
+            ambient_temperature=int.from_bytes(data._ambient_temperature, "big") / 10,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "time": datetime.fromtimestamp(self.at, UTC).isoformat(),
+            "voltage": self.voltage,
+            "body_temperature": self.body_temperature,
+            "ambient_temperature": self.ambient_temperature,
+        }
+
+
+class TelemetryBuffer:
+    """The most recent TELEMETRY_WINDOW readings from one heater. Older ones fall off the end."""
+
+    __slots__ = ("samples",)
+
+    def __init__(self, size: int = TELEMETRY_WINDOW) -> None:
+        self.samples: collections.deque[TelemetrySample] = collections.deque(
+            maxlen=size
+        )
+
+    def record(
+        self, data: hcalory_control.heater.HeaterResponse, at: float | None = None
+    ) -> None:
+        self.samples.append(
+            TelemetrySample.from_response(data, time.time() if at is None else at)
+        )
+
+    def summarize(self, since: float) -> dict[str, float]:
+        """
+        min, max and mean of every field over the samples taken at or after since, keyed like "voltage_min".
+
+        Empty if there haven't been any, so whoever's publishing can hang on to the last summary instead.
+        """
+        recent = [sample for sample in self.samples if sample.at >= since]
+        if not recent:
+            return {}
+        summary: dict[str, float] = {}
+        for field in TELEMETRY_FIELDS:
+            values = [getattr(sample, field) for sample in recent]
+            summary[f"{field}_min"] = min(values)
+            summary[f"{field}_max"] = max(values)
+            summary[f"{field}_mean"] = round(sum(values) / len(values), 2)
+        return summary
+
+    def as_list(self) -> list[dict[str, Any]]:
+        return [sample.as_dict() for sample in self.samples]
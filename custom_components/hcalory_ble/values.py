@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import dataclasses
+
+import hcalory_control.heater
+
+# Modes the heater can be in but nobody can pick. The mode select shows nothing for these.
+UNSELECTABLE_MODES: frozenset[hcalory_control.heater.HeaterMode] = frozenset(
+    (
+        hcalory_control.heater.HeaterMode.off,
+        hcalory_control.heater.HeaterMode.ignition_failed,
+    )
+)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class HeaterValues:
+    """
+    Everything the entities show from one HeaterResponse, in the form they show it.
+
+    The coordinator builds one of these per update, so a frame costs the same no matter how many entities are
+    looking at it. Field names match the HeaterResponse fields they come from.
+    """
+
+    heater_state: str
+    heater_mode: str
+    # What the mode select shows. None when the heater is in a mode you can't pick.
+    mode_option: str | None
+    heater_setting: float
+    running: bool
+    voltage: int
+    body_temperature: int
+    ambient_temperature: int
+
+    @classmethod
+    def from_response(cls, data: hcalory_control.heater.HeaterResponse) -> HeaterValues:
+        mode = data.heater_mode
+        return cls(
+            heater_state=data.heater_state.name,
+            heater_mode=mode.name,
+            mode_option=None if mode in UNSELECTABLE_MODES else mode.name,
+            heater_setting=float(data.heater_setting),
+            running=data.running,
+            voltage=data.voltage,
+            body_temperature=data.body_temperature,
+            ambient_temperature=data.ambient_temperature,
+        )